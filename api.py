@@ -0,0 +1,275 @@
+"""Async JSON API over food_waste.db: the report catalog and filtered table lookups.
+
+Queries run on a fixed pool of read-only connections in worker threads, and encoded
+responses are kept in an LRU cache with a TTL that is emptied whenever the database
+version changes, so every client shares one warm query layer.
+
+    python api.py --port 8000
+
+    GET /health
+    GET /reports
+    GET /reports/{name}?city=Andersonville&status=Completed&days=3&scope=hot
+    GET /{table}?City=A&City=B&q=text&from=2025-03-01&to=2025-03-07&order_by=-Quantity&limit=100&offset=0
+    GET /{table}/{id}
+
+{table} is providers, receivers, food_listings or claims. Repeating a column parameter
+matches any of the values; q searches the table's name column, and from/to bound its
+date column. Reports read hot and archived rows unless scope=hot; table lookups
+read the hot (working) tables.
+"""
+import argparse
+import json
+import queue
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import archive
+import run_queries
+from cache import LRUCache
+from data_layer import DB_PATH, build_where, connect_readonly, database_version
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+POOL_SIZE = 8
+CACHE_SIZE = 1024
+CACHE_TTL = 60  # seconds
+
+# Per table: primary key, filterable columns, searchable name column, date column
+TABLES = {
+    "providers": {"key": "Provider_ID", "filters": ["Type", "City"], "search": "Name", "date": None},
+    "receivers": {"key": "Receiver_ID", "filters": ["Type", "City"], "search": "Name", "date": None},
+    "food_listings": {"key": "Food_ID",
+                      "filters": ["Provider_ID", "Provider_Type", "Location", "Food_Type", "Meal_Type"],
+                      "search": "Food_Name", "date": "Expiry_Date"},
+    "claims": {"key": "Claim_ID", "filters": ["Food_ID", "Receiver_ID", "Status"], "search": None,
+               "date": "Timestamp"},
+}
+
+
+# =========================
+# Connection pool and response cache
+# =========================
+class ConnectionPool:
+    """A fixed set of read-only connections shared by the worker threads."""
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        self.size = size
+        # LIFO so the most recently used (warmest) connection is handed out first
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(connect_readonly(db_path))
+
+    @contextmanager
+    def connection(self):
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class ResponseCache(LRUCache):
+    """LRU of encoded response bodies with a TTL, emptied when the database changes."""
+
+    def __init__(self, db_path=DB_PATH, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        super().__init__(maxsize, ttl)
+        self.db_path = db_path
+        self.version = database_version(db_path)
+
+    def current_version(self):
+        version = database_version(self.db_path)
+        if version != self.version:
+            self.clear()
+            self.version = version
+        return version
+
+    def get(self, key, default=None):
+        self.current_version()
+        return super().get(key, default)
+
+    def put(self, key, body, version):
+        """Store `body` computed against `version`; dropped if the database moved on since."""
+        if version == self.current_version():
+            super().put(key, body)
+
+    def stats(self):
+        return dict(super().stats(), version=self.version)
+
+
+# =========================
+# Queries
+# =========================
+def _rows(cursor):
+    columns = [d[0] for d in cursor.description]
+    return columns, [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _int_param(query, name, default, low=0, high=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise HTTPException(400, f"{name} must be an integer")
+    if value < low or (high is not None and value > high):
+        bounds = f"between {low} and {high}" if high is not None else f"at least {low}"
+        raise HTTPException(400, f"{name} must be {bounds}")
+    return value
+
+
+def _page(query):
+    return _int_param(query, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT), _int_param(query, "offset", 0)
+
+
+def list_rows(conn, table, query):
+    """One page of filtered rows plus the total number matching."""
+    spec = TABLES[table]
+    limit, offset = _page(query)
+    isin = {col: query.getlist(col) for col in spec["filters"] if col in query}
+    search = (table, spec["search"], query["q"]) if spec["search"] and "q" in query else None
+    between = None
+    if spec["date"] and ("from" in query or "to" in query):
+        between = {spec["date"]: (query.get("from", "0000-01-01"), query.get("to", "9999-12-31"))}
+    where, params = build_where(isin=isin, between=between, search=search)
+
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    order_by = query.get("order_by", spec["key"])
+    column = order_by.lstrip("-")
+    if column not in columns:
+        raise HTTPException(400, f"order_by must be one of {', '.join(columns)} (prefix - for descending)")
+    direction = "DESC" if order_by.startswith("-") else "ASC"
+    # The key breaks ties so pages do not overlap
+    order = f"{column} {direction}" + (f", {spec['key']}" if column != spec["key"] else "")
+
+    total = conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+    columns, rows = _rows(conn.execute(f"SELECT * FROM {table}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                                       params + [limit, offset]))
+    return {"table": table, "total": total, "limit": limit, "offset": offset, "rows": rows}
+
+
+def get_row(conn, table, row_id):
+    key = TABLES[table]["key"]
+    _, rows = _rows(conn.execute(f"SELECT * FROM {table} WHERE {key} = ?", [row_id]))
+    if not rows:
+        raise HTTPException(404, f"no {table} row with {key} = {row_id}")
+    return rows[0]
+
+
+def run_report(conn, report, query):
+    """One report with parameters from the query string (catalog defaults otherwise)."""
+    params = {name: query[name] for name in report["params"] if name in query}
+    if "days" in params:
+        params["days"] = _int_param(query, "days", run_queries.DEFAULT_PARAMS["days"])
+    bound = run_queries.bindings(report, params)[0]
+    limit, offset = _page(query)
+    scope = query.get("scope", "all")
+    if scope not in archive.SCOPES:
+        raise HTTPException(400, f"scope must be one of {', '.join(archive.SCOPES)}")
+    columns, rows = _rows(conn.execute(run_queries.scoped(report, scope)["sql"], bound))
+    return {"name": report["name"], "title": report["title"], "params": bound, "columns": columns,
+            "total": len(rows), "limit": limit, "offset": offset, "rows": rows[offset:offset + limit]}
+
+
+# =========================
+# HTTP
+# =========================
+async def cached_json(request, compute):
+    """Serve `compute(conn)` as JSON from the cache, running it on a pooled connection if needed."""
+    cache = request.app.state.cache
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    body = cache.get(key)
+    status = "HIT"
+    if body is None:
+        status = "MISS"
+        version = cache.version
+
+        def work():
+            with request.app.state.pool.connection() as conn:
+                return json.dumps(compute(conn), default=str).encode()
+
+        body = await run_in_threadpool(work)
+        cache.put(key, body, version)
+    return Response(body, media_type="application/json", headers={"X-Cache": status})
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "pool": request.app.state.pool.size,
+                         "cache": request.app.state.cache.stats()})
+
+
+async def list_reports(request):
+    return JSONResponse([{"name": q["name"], "title": q["title"], "params": q["params"]}
+                         for q in run_queries.queries])
+
+
+async def report(request):
+    try:
+        found = run_queries.find_reports([request.path_params["name"]])[0]
+    except KeyError:
+        raise HTTPException(404, f"unknown report {request.path_params['name']!r}")
+    return await cached_json(request, lambda conn: run_report(conn, found, request.query_params))
+
+
+def _table(request):
+    table = request.path_params["table"]
+    if table not in TABLES:
+        raise HTTPException(404, f"unknown table {table!r}; expected one of {', '.join(TABLES)}")
+    return table
+
+
+async def table_rows(request):
+    table = _table(request)
+    return await cached_json(request, lambda conn: list_rows(conn, table, request.query_params))
+
+
+async def table_row(request):
+    table = _table(request)
+    return await cached_json(request, lambda conn: get_row(conn, table, request.path_params["row_id"]))
+
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code)
+
+
+def create_app(db_path=DB_PATH, pool_size=POOL_SIZE, cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL):
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.pool = ConnectionPool(db_path, pool_size)
+        app.state.cache = ResponseCache(db_path, cache_size, cache_ttl)
+        yield
+        app.state.pool.close()
+
+    routes = [
+        Route("/health", health),
+        Route("/reports", list_reports),
+        Route("/reports/{name}", report),
+        Route("/{table}", table_rows),
+        Route("/{table}/{row_id:int}", table_row),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan, exception_handlers={HTTPException: http_error})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve food_waste.db as a JSON API.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="read-only connections")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="cached responses (0 disables)")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL, help="seconds a response stays cached")
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(args.db, args.pool_size, args.cache_size, args.cache_ttl),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,57 +2,180 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+import build_db
+import data_layer as dl
+import frames
+import snapshots
+from cache import LRUCache
+
 st.set_page_config(page_title="Food Waste Management", page_icon="🍽️", layout="wide")
 
 # =========================
 # Data Loading
 # =========================
+# All pages query food_waste.db with filters pushed down into SQL, so only the
+# visible page of rows and pre-aggregated chart data ever reach pandas.
+if not build_db.DB_PATH.exists():
+    build_db.build()
+
+
+# Filter options and date bounds read a single memory-mapped column from the columnar
+# snapshot (build_db.py --snapshot) when it is fresh, instead of scanning the table.
+# Both are cached per database version, so new rows show up after the next write.
 @st.cache_data
-def load_data():
-    providers = pd.read_csv("providers_data.csv")        # Provider_ID,Name,Type,Address,City,Contact
-    receivers = pd.read_csv("receivers_data.csv")        # Receiver_ID,Name,Type,City,Contact
-    food_listings = pd.read_csv("food_listings_data.csv")# Food_ID,Food_Name,Quantity,Expiry_Date,Provider_ID,Provider_Type,Location,Food_Type,Meal_Type
-    claims = pd.read_csv("claims_data.csv")              # Claim_ID,Food_ID,Receiver_ID,Status,Timestamp
+def filter_options(table, column, version):
+    frame = snapshots.load_snapshot(table, [column])
+    if frame is not None:
+        return sorted(frame[column].dropna().unique().tolist())
+    return dl.distinct_values(table, column)
+
+
+@st.cache_data
+def date_bounds(table, column, version):
+    frame = snapshots.load_snapshot(table, [column])
+    if frame is not None:
+        lo, hi = frame[column].min(), frame[column].max()
+    else:
+        lo, hi = dl.min_max(table, column)
+    return (pd.to_datetime(lo).date() if pd.notna(lo) else None,
+            pd.to_datetime(hi).date() if pd.notna(hi) else None)
 
-    # Normalize/parse dates that exist
-    if "Expiry_Date" in food_listings.columns:
-        food_listings["Expiry_Date"] = pd.to_datetime(food_listings["Expiry_Date"], errors="coerce")
-    if "Timestamp" in claims.columns:
-        claims["Timestamp"] = pd.to_datetime(claims["Timestamp"], errors="coerce")
 
-    # Coerce numerics where helpful
-    if "Quantity" in food_listings.columns:
-        food_listings["Quantity"] = pd.to_numeric(food_listings["Quantity"], errors="coerce")
+# =========================
+# Render cache
+# =========================
+# Filtered tables and figure specs are shared by every session, keyed on page, section,
+# normalized filter state and database version, so a rerun or another user with the
+# same filters reuses them instead of re-querying and rebuilding the figures.
+RENDER_CACHE_SIZE = 512
+RENDER_CACHE_TTL = 600  # seconds
+data_version = dl.database_version()
+_MISSING = object()
+
+
+@st.cache_resource
+def render_cache():
+    return LRUCache(RENDER_CACHE_SIZE, RENDER_CACHE_TTL)
+
+def normalize(value):
+    """Hashable, order-insensitive form of a filter value (selections are sets)."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(sorted(normalize(v) for v in value))
+    if isinstance(value, tuple):
+        return tuple(normalize(v) for v in value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def memo(page, section, state, compute):
+    """compute() once per page, section, filter state and database version."""
+    key = (page, section, normalize(state), data_version)
+    cache = render_cache()
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.put(key, value)
+    return value
 
-    return providers, receivers, food_listings, claims
 
+# =========================
+# Live feed
+# =========================
+# Claims and listings held in memory and kept current from the change feed: each poll
+# reads MAX(Seq) and merges only the rows changed since, never the whole table.
+LIVE_POLL_SECONDS = 5
+LIVE_RECENT_ROWS = 10
+
+
+@st.cache_resource
+def live_frames():
+    return {"claims": frames.LiveFrame("claims", ["Status"]),
+            "food_listings": frames.LiveFrame("food_listings", ["Food_Type"])}
 
-providers, receivers, food_listings, claims = load_data()
 
 # =========================
 # Helpers
 # =========================
-def vc_df(series, name_col="value", count_col="count"):
-    """value_counts to tidy DataFrame with predictable column names."""
-    out = series.value_counts(dropna=False).reset_index(name=count_col)
-    out.rename(columns={"index": name_col}, inplace=True)
-    return out
+PAGE_SIZES = [25, 50, 100, 250]
 
 def safe_selectbox(label, options, default="All"):
     opts = ["All"] + sorted([o for o in options if pd.notna(o)])
     return st.selectbox(label, opts, index=opts.index(default) if default in opts else 0)
 
+def multiselect_filter(label, table, column):
+    """All-selected multiselect; returns the selection as a push-down filter (None = no filter)."""
+    options = filter_options(table, column, data_version)
+    sel = st.multiselect(label, options=options, default=options)
+    return dl.selected(sel, options)
+
+def date_range_filter(label, table, column):
+    """Date range as a push-down filter; the untouched full range is no filter (None)."""
+    min_d, max_d = date_bounds(table, column, data_version)
+    if min_d is None or max_d is None:
+        return None
+    date_range = st.date_input(label, [min_d, max_d])
+    if not date_range or len(date_range) != 2 or tuple(date_range) == (min_d, max_d):
+        return None
+    return tuple(date_range)
+
+def show_page(page, state, table, where, params, key):
+    """Keyset-paginated table with server-side sort: only one page of rows and a count leave SQLite."""
+    columns = memo(page, "columns", {}, lambda: dl.table_columns(table))
+    o1, o2, o3 = st.columns([2, 1, 1])
+    sort = o1.selectbox("Sort by", columns, index=columns.index(key), key=f"{page}_sort")
+    descending = o2.toggle("Descending", key=f"{page}_desc")
+    size = o3.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(dl.DEFAULT_PAGE_SIZE),
+                        key=f"{page}_size")
+
+    # Cursor at the start of each page visited so far; new filters or ordering restart at page 1
+    view = normalize({"filters": state, "sort": sort, "descending": descending, "size": size})
+    if st.session_state.get(f"{page}_view") != view:
+        st.session_state[f"{page}_view"] = view
+        st.session_state[f"{page}_cursors"] = [None]
+    cursors = st.session_state[f"{page}_cursors"]
+
+    total = memo(page, "total", state, lambda: dl.count_rows(table, where, params))
+    rows = memo(page, "rows", {"view": view, "after": cursors[-1]}, lambda: dl.fetch_page(
+        table, where, params, key=key, sort=sort, descending=descending, after=cursors[-1], limit=size))
+    first = (len(cursors) - 1) * size
+    st.dataframe(rows, use_container_width=True, hide_index=True, height=380)
+
+    p1, p2, p3 = st.columns([1, 1, 4])
+    p1.button("◀ Previous", key=f"{page}_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+    p2.button("Next ▶", key=f"{page}_next", disabled=first + len(rows) >= total,
+              on_click=cursors.append, args=(dl.page_cursor(rows, key, sort),))
+    shown = f"{first + 1:,}–{first + len(rows):,}" if len(rows) else "0"
+    p3.caption(f"Showing {shown} of {total:,} matching rows (page {len(cursors):,})")
+    return total
+
+def plot(chart, df, **kwargs):
+    """Figure spec (a plain dict, which is what gets cached) or None when `df` is empty."""
+    return None if df.empty else chart(df, **kwargs).to_dict()
+
+def show_chart(page, section, state, build):
+    """Render a memoized figure; `build` returns a spec or None when there is nothing to plot."""
+    spec = memo(page, section, state, build)
+    if spec is not None:
+        st.plotly_chart(spec, use_container_width=True)
+    return spec
+
 # =========================
 # Overview
 # =========================
-def page_overview(providers, receivers, food_listings, claims):
+def page_overview():
     st.title("🌍 Food Waste Management Dashboard — Overview")
 
+    counts = memo("overview", "counts", {},
+                  lambda: [dl.count_rows(t) for t in ("providers", "receivers", "food_listings", "claims")])
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("🏢 Providers", len(providers) if not providers.empty else 0)
-    c2.metric("🤝 Receivers", len(receivers) if not receivers.empty else 0)
-    c3.metric("🍱 Food Listings", len(food_listings) if not food_listings.empty else 0)
-    c4.metric("📦 Claims", len(claims) if not claims.empty else 0)
+    c1.metric("🏢 Providers", counts[0])
+    c2.metric("🤝 Receivers", counts[1])
+    c3.metric("🍱 Food Listings", counts[2])
+    c4.metric("📦 Claims", counts[3])
+
+    live_status()
 
     st.divider()
 
@@ -61,241 +184,206 @@ def page_overview(providers, receivers, food_listings, claims):
     # Providers & Receivers per City
     with colL:
         st.subheader("🏙️ Providers & Receivers by City")
-        prov_city = vc_df(providers["City"], "City", "Providers") if "City" in providers.columns else pd.DataFrame()
-        recv_city = vc_df(receivers["City"], "City", "Receivers") if "City" in receivers.columns else pd.DataFrame()
-        if not prov_city.empty or not recv_city.empty:
-            merged_city = prov_city.merge(recv_city, on="City", how="outer").fillna(0)
-            fig = px.bar(merged_city.melt(id_vars="City", var_name="Category", value_name="Count"),
-                         x="City", y="Count", color="Category", barmode="group",
-                         title="Providers & Receivers by City")
-            st.plotly_chart(fig, use_container_width=True)
-        else:
+        if not show_chart("overview", "city", {}, lambda: plot(
+                px.bar, dl.providers_receivers_by_city().melt(id_vars="City", var_name="Category",
+                                                              value_name="Count"),
+                x="City", y="Count", color="Category", barmode="group",
+                title="Providers & Receivers by City")):
             st.info("City data not available in providers/receivers.")
 
     # Claims over Time
     with colR:
         st.subheader("⏳ Claims Over Time")
-        if "Timestamp" in claims.columns and not claims["Timestamp"].isna().all():
-            fig = px.histogram(claims, x="Timestamp", nbins=30, title="Claims Over Time")
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No Timestamp column in claims or all values are missing.")
+        if not show_chart("overview", "claims_over_time", {}, lambda: plot(
+                px.bar, dl.count_by_bucket("claims", "day", count_col="Claims"),
+                x="Date", y="Claims", title="Claims Over Time")):
+            st.info("No claim timestamps available.")
 
     st.divider()
 
     # Top Food Types by Quantity
     st.subheader("🍽️ Top Food Types by Total Quantity")
-    if {"Food_Type", "Quantity"}.issubset(food_listings.columns):
-        qty_by_type = food_listings.groupby("Food_Type", dropna=False)["Quantity"].sum().reset_index()
-        qty_by_type = qty_by_type.sort_values("Quantity", ascending=False)
-        fig = px.bar(qty_by_type, x="Food_Type", y="Quantity", title="Total Quantity by Food Type")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Food_Type and/or Quantity not available in food listings.")
+    if not show_chart("overview", "quantity_by_food_type", {}, lambda: plot(
+            px.bar, dl.quantity_by_food_type(), x="Food_Type", y="Quantity",
+            title="Total Quantity by Food Type")):
+        st.info("No food listings available.")
+
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def live_status():
+    st.subheader("🔴 Live Claim Status")
+    live = live_frames()
+    merged = {table: lf.refresh() for table, lf in live.items()}
+    claims, listings = live["claims"], live["food_listings"]
+    status_counts = claims.counts["Status"]
+    cols = st.columns(max(1, len(status_counts)) + 1)
+    for col, (status, count) in zip(cols, status_counts.items()):
+        col.metric(status, f"{count:,}")
+    cols[-1].metric("Listed Quantity", f"{int(listings.frame['Quantity'].sum()):,}")
+    recent = claims.frame.tail(LIVE_RECENT_ROWS).iloc[::-1].reset_index()
+    st.dataframe(recent, use_container_width=True, hide_index=True)
+    note = ", ".join(f"{table}: {'reloaded' if n < 0 else f'{n:,} rows merged'}" for table, n in merged.items())
+    st.caption(f"Change feed at seq {claims.seq:,}; last poll {note}. Refreshes every {LIVE_POLL_SECONDS}s.")
 
 # =========================
 # Providers
 # =========================
-def page_providers(df):
+def page_providers():
     st.title("🏢 Providers")
 
     with st.expander("🔎 Filters", expanded=True):
-        type_sel = st.multiselect("Filter by Provider Type",
-                                  options=sorted(df["Type"].dropna().unique()) if "Type" in df.columns else [],
-                                  default=sorted(df["Type"].dropna().unique()) if "Type" in df.columns else [])
-        city_sel = st.multiselect("Filter by City",
-                                  options=sorted(df["City"].dropna().unique()) if "City" in df.columns else [],
-                                  default=sorted(df["City"].dropna().unique()) if "City" in df.columns else [])
+        type_sel = multiselect_filter("Filter by Provider Type", "providers", "Type")
+        city_sel = multiselect_filter("Filter by City", "providers", "City")
         name_search = st.text_input("Search by name (contains)")
 
-    f = df.copy()
-    if "Type" in f.columns and type_sel:
-        f = f[f["Type"].isin(type_sel)]
-    if "City" in f.columns and city_sel:
-        f = f[f["City"].isin(city_sel)]
-    if "Name" in f.columns and name_search:
-        f = f[f["Name"].str.contains(name_search, case=False, na=False)]
-
-    st.dataframe(f, use_container_width=True, height=380)
+    state = {"Type": type_sel, "City": city_sel, "Name": name_search}
+    where, params = dl.build_where(isin={"Type": type_sel, "City": city_sel},
+                                   search=("providers", "Name", name_search))
+    total = show_page("providers", state, "providers", where, params, key="Provider_ID")
 
     st.subheader("📊 Insights")
     g1, g2 = st.columns(2)
     with g1:
-        if "Type" in f.columns and not f.empty:
-            tdf = vc_df(f["Type"], "Type", "count")
-            fig = px.bar(tdf, x="Type", y="count", title="Providers by Type")
-            st.plotly_chart(fig, use_container_width=True)
+        if total:
+            show_chart("providers", "by_type", state, lambda: plot(
+                px.bar, dl.count_by("providers", "Type", where, params),
+                x="Type", y="count", title="Providers by Type"))
     with g2:
-        if "City" in f.columns and not f.empty:
-            cdf = vc_df(f["City"], "City", "count")
-            fig = px.bar(cdf, x="City", y="count", title="Providers by City")
-            st.plotly_chart(fig, use_container_width=True)
+        if total:
+            show_chart("providers", "by_city", state, lambda: plot(
+                px.bar, dl.count_by("providers", "City", where, params),
+                x="City", y="count", title="Providers by City"))
 
 # =========================
 # Receivers
 # =========================
-def page_receivers(df):
+def page_receivers():
     st.title("🤝 Receivers")
 
     with st.expander("🔎 Filters", expanded=True):
-        type_sel = st.multiselect("Filter by Receiver Type",
-                                  options=sorted(df["Type"].dropna().unique()) if "Type" in df.columns else [],
-                                  default=sorted(df["Type"].dropna().unique()) if "Type" in df.columns else [])
-        city_sel = st.multiselect("Filter by City",
-                                  options=sorted(df["City"].dropna().unique()) if "City" in df.columns else [],
-                                  default=sorted(df["City"].dropna().unique()) if "City" in df.columns else [])
+        type_sel = multiselect_filter("Filter by Receiver Type", "receivers", "Type")
+        city_sel = multiselect_filter("Filter by City", "receivers", "City")
         name_search = st.text_input("Search by name (contains)")
 
-    f = df.copy()
-    if "Type" in f.columns and type_sel:
-        f = f[f["Type"].isin(type_sel)]
-    if "City" in f.columns and city_sel:
-        f = f[f["City"].isin(city_sel)]
-    if "Name" in f.columns and name_search:
-        f = f[f["Name"].str.contains(name_search, case=False, na=False)]
-
-    st.dataframe(f, use_container_width=True, height=380)
+    state = {"Type": type_sel, "City": city_sel, "Name": name_search}
+    where, params = dl.build_where(isin={"Type": type_sel, "City": city_sel},
+                                   search=("receivers", "Name", name_search))
+    total = show_page("receivers", state, "receivers", where, params, key="Receiver_ID")
 
     st.subheader("📊 Insights")
     g1, g2 = st.columns(2)
     with g1:
-        if "Type" in f.columns and not f.empty:
-            tdf = vc_df(f["Type"], "Type", "count")
-            fig = px.pie(tdf, names="Type", values="count", title="Receiver Type Distribution")
-            st.plotly_chart(fig, use_container_width=True)
+        if total:
+            show_chart("receivers", "by_type", state, lambda: plot(
+                px.pie, dl.count_by("receivers", "Type", where, params),
+                names="Type", values="count", title="Receiver Type Distribution"))
     with g2:
-        if "City" in f.columns and not f.empty:
-            cdf = vc_df(f["City"], "City", "count")
-            fig = px.bar(cdf, x="City", y="count", title="Receivers by City")
-            st.plotly_chart(fig, use_container_width=True)
+        if total:
+            show_chart("receivers", "by_city", state, lambda: plot(
+                px.bar, dl.count_by("receivers", "City", where, params),
+                x="City", y="count", title="Receivers by City"))
 
 # =========================
 # Food Listings
 # =========================
-def page_food_listings(df):
+def page_food_listings():
     st.title("🍱 Food Listings")
 
     with st.expander("🔎 Filters", expanded=True):
-        prov_type = st.multiselect("Provider Type",
-                                   options=sorted(df["Provider_Type"].dropna().unique()) if "Provider_Type" in df.columns else [],
-                                   default=sorted(df["Provider_Type"].dropna().unique()) if "Provider_Type" in df.columns else [])
-        location = st.multiselect("Location",
-                                  options=sorted(df["Location"].dropna().unique()) if "Location" in df.columns else [],
-                                  default=sorted(df["Location"].dropna().unique()) if "Location" in df.columns else [])
-        food_type = st.multiselect("Food Type",
-                                   options=sorted(df["Food_Type"].dropna().unique()) if "Food_Type" in df.columns else [],
-                                   default=sorted(df["Food_Type"].dropna().unique()) if "Food_Type" in df.columns else [])
-        meal_type = st.multiselect("Meal Type",
-                                   options=sorted(df["Meal_Type"].dropna().unique()) if "Meal_Type" in df.columns else [],
-                                   default=sorted(df["Meal_Type"].dropna().unique()) if "Meal_Type" in df.columns else [])
+        prov_type = multiselect_filter("Provider Type", "food_listings", "Provider_Type")
+        location = multiselect_filter("Location", "food_listings", "Location")
+        food_type = multiselect_filter("Food Type", "food_listings", "Food_Type")
+        meal_type = multiselect_filter("Meal Type", "food_listings", "Meal_Type")
         name_search = st.text_input("Search Food Name (contains)")
 
         # Date range on Expiry_Date
-        date_range = None
-        if "Expiry_Date" in df.columns and not df["Expiry_Date"].isna().all():
-            min_d = pd.to_datetime(df["Expiry_Date"], errors="coerce").min()
-            max_d = pd.to_datetime(df["Expiry_Date"], errors="coerce").max()
-            if pd.notna(min_d) and pd.notna(max_d):
-                date_range = st.date_input("Expiry Date Range", [min_d.date(), max_d.date()])
-
-    f = df.copy()
-    if prov_type and "Provider_Type" in f.columns:
-        f = f[f["Provider_Type"].isin(prov_type)]
-    if location and "Location" in f.columns:
-        f = f[f["Location"].isin(location)]
-    if food_type and "Food_Type" in f.columns:
-        f = f[f["Food_Type"].isin(food_type)]
-    if meal_type and "Meal_Type" in f.columns:
-        f = f[f["Meal_Type"].isin(meal_type)]
-    if name_search and "Food_Name" in f.columns:
-        f = f[f["Food_Name"].str.contains(name_search, case=False, na=False)]
-    if date_range and len(date_range) == 2 and "Expiry_Date" in f.columns:
-        f = f[(f["Expiry_Date"] >= pd.to_datetime(date_range[0])) &
-              (f["Expiry_Date"] <= pd.to_datetime(date_range[1]))]
-
-    st.dataframe(f, use_container_width=True, height=380)
+        date_range = date_range_filter("Expiry Date Range", "food_listings", "Expiry_Date")
+
+    state = {"Provider_Type": prov_type, "Location": location, "Food_Type": food_type,
+             "Meal_Type": meal_type, "Food_Name": name_search, "Expiry_Date": date_range}
+    where, params = dl.build_where(
+        isin={"Provider_Type": prov_type, "Location": location,
+              "Food_Type": food_type, "Meal_Type": meal_type},
+        search=("food_listings", "Food_Name", name_search),
+        between={"Expiry_Date": date_range},
+    )
+    total = show_page("food_listings", state, "food_listings", where, params, key="Food_ID")
 
     st.subheader("📊 Insights")
     g1, g2 = st.columns(2)
     with g1:
-        if "Food_Type" in f.columns and not f.empty:
-            tdf = vc_df(f["Food_Type"], "Food_Type", "count")
-            fig = px.bar(tdf, x="Food_Type", y="count", title="Listings by Food Type")
-            st.plotly_chart(fig, use_container_width=True)
+        if total:
+            show_chart("food_listings", "by_food_type", state, lambda: plot(
+                px.bar, dl.count_by("food_listings", "Food_Type", where, params),
+                x="Food_Type", y="count", title="Listings by Food Type"))
     with g2:
-        if "Expiry_Date" in f.columns and not f["Expiry_Date"].isna().all():
-            fig = px.histogram(f, x="Expiry_Date", title="Expiry Date Distribution", nbins=30)
-            st.plotly_chart(fig, use_container_width=True)
+        grain = st.radio("Bucket", ["day", "week"], horizontal=True, key="expiry_grain")
+
+        def expiry_chart():
+            # The expiry rollup is keyed by City and Food_Type; other filters need the rows
+            if prov_type or meal_type or name_search:
+                per_day = dl.count_by_day("food_listings", "Expiry_Date", where, params)
+            else:
+                per_day = dl.count_by_bucket("food_listings", grain,
+                                             isin={"City": location, "Food_Type": food_type},
+                                             between=date_range)
+            return plot(px.bar, per_day, x="Date", y="count", title="Expiry Date Distribution")
+
+        show_chart("food_listings", f"expiry_{grain}", state, expiry_chart)
 
-    if {"Food_Type", "Quantity"}.issubset(f.columns) and not f.empty:
+    if total:
         st.subheader("📦 Total Quantity by Food Type")
-        qdf = f.groupby("Food_Type", dropna=False)["Quantity"].sum().reset_index()
-        qdf = qdf.sort_values("Quantity", ascending=False)
-        fig = px.bar(qdf, x="Food_Type", y="Quantity", title="Total Quantity by Food Type")
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart("food_listings", "quantity_by_food_type", state, lambda: plot(
+            px.bar, dl.sum_by("food_listings", "Food_Type", "Quantity", where, params),
+            x="Food_Type", y="Quantity", title="Total Quantity by Food Type"))
 
 # =========================
 # Claims
 # =========================
-def page_claims(claims, food_listings, receivers):
+def page_claims():
     st.title("📦 Claims")
 
     with st.expander("🔎 Filters", expanded=True):
-        status_sel = st.multiselect("Status",
-                                    options=sorted(claims["Status"].dropna().unique()) if "Status" in claims.columns else [],
-                                    default=sorted(claims["Status"].dropna().unique()) if "Status" in claims.columns else [])
-
-        date_range = None
-        if "Timestamp" in claims.columns and not claims["Timestamp"].isna().all():
-            min_d = claims["Timestamp"].min()
-            max_d = claims["Timestamp"].max()
-            if pd.notna(min_d) and pd.notna(max_d):
-                date_range = st.date_input("Timestamp Range", [min_d.date(), max_d.date()])
-
-    f = claims.copy()
-    if status_sel and "Status" in f.columns:
-        f = f[f["Status"].isin(status_sel)]
-    if date_range and len(date_range) == 2 and "Timestamp" in f.columns:
-        f = f[(f["Timestamp"] >= pd.to_datetime(date_range[0])) &
-              (f["Timestamp"] <= pd.to_datetime(date_range[1]))]
-
-    st.dataframe(f, use_container_width=True, height=380)
+        status_sel = multiselect_filter("Status", "claims", "Status")
+        date_range = date_range_filter("Timestamp Range", "claims", "Timestamp")
+
+    filters = dict(isin={"Status": status_sel}, between={"Timestamp": date_range})
+    where, params = dl.build_where(**filters)
+    total = show_page("claims", filters, "claims", where, params, key="Claim_ID")
 
     st.subheader("📊 Insights")
     g1, g2 = st.columns(2)
 
     with g1:
-        if "Timestamp" in f.columns and not f["Timestamp"].isna().all():
-            fig = px.histogram(f, x="Timestamp", title="Claims Over Time", nbins=30)
-            st.plotly_chart(fig, use_container_width=True)
-        elif "Status" in f.columns:
-            sdf = vc_df(f["Status"], "Status", "count")
-            fig = px.pie(sdf, names="Status", values="count", title="Claims by Status")
-            st.plotly_chart(fig, use_container_width=True)
+        grain = st.radio("Bucket", ["hour", "day", "week"], index=1, horizontal=True, key="claims_grain")
+
+        def claims_chart():
+            per_day = dl.count_by_bucket("claims", grain, isin={"Status": status_sel}, between=date_range)
+            if not per_day.empty:
+                return plot(px.bar, per_day, x="Date", y="count", title="Claims Over Time")
+            if total:
+                return plot(px.pie, dl.count_by("claims", "Status", where, params),
+                            names="Status", values="count", title="Claims by Status")
+            return None
+
+        show_chart("claims", f"over_time_{grain}", filters, claims_chart)
+
+    # Claims joined to food_listings / receivers use the same filters on the claims alias
+    c_where, c_params = dl.build_where(**filters, alias="c")
 
     with g2:
         # Claims per Provider (join via Food_ID -> Provider_ID from food_listings)
-        if {"Food_ID"}.issubset(f.columns) and {"Food_ID", "Provider_ID"}.issubset(food_listings.columns):
-            merged = f.merge(food_listings[["Food_ID", "Provider_ID"]], on="Food_ID", how="left")
-            if "Provider_ID" in merged.columns and not merged["Provider_ID"].isna().all():
-                cdf = vc_df(merged["Provider_ID"], "Provider_ID", "Claims")
-                fig = px.bar(cdf, x="Provider_ID", y="Claims", title="Claims per Provider")
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("Provider_ID not available after merging claims with food_listings.")
-        else:
-            st.info("Need Food_ID in claims and Provider_ID in food_listings to show claims per provider.")
+        if not show_chart("claims", "per_provider", filters, lambda: plot(
+                px.bar, dl.claims_per_provider(c_where, c_params),
+                x="Provider_ID", y="Claims", title="Claims per Provider")):
+            st.info("No claims match the current filters.")
 
     # Top Receivers by Completed Claims
-    if {"Receiver_ID", "Status"}.issubset(f.columns) and "Name" in receivers.columns:
-        completed = f[f["Status"].str.lower() == "completed"] if f["Status"].dtype == object else f
-        top_recv = completed["Receiver_ID"].value_counts().reset_index(name="Completed_Claims")
-        top_recv.rename(columns={"index": "Receiver_ID"}, inplace=True)
-        top_recv = top_recv.merge(receivers[["Receiver_ID", "Name"]], on="Receiver_ID", how="left")
-        if not top_recv.empty:
-            st.subheader("🏆 Top Receivers (Completed Claims)")
-            fig = px.bar(top_recv.head(15), x="Name", y="Completed_Claims", title="Top Receivers by Completed Claims")
-            st.plotly_chart(fig, use_container_width=True)
+    top_recv = memo("claims", "top_receivers", filters, lambda: plot(
+        px.bar, dl.top_receivers_completed(c_where, c_params),
+        x="Name", y="Completed_Claims", title="Top Receivers by Completed Claims"))
+    if top_recv:
+        st.subheader("🏆 Top Receivers (Completed Claims)")
+        st.plotly_chart(top_recv, use_container_width=True)
 
 # =========================
 # Sidebar & Routing
@@ -304,13 +392,25 @@ st.sidebar.title("📌 Navigation")
 page = st.sidebar.radio("Go to", ["Overview", "Providers", "Receivers", "Food Listings", "Claims"])
 
 if page == "Overview":
-    page_overview(providers, receivers, food_listings, claims)
+    page_overview()
 elif page == "Providers":
-    page_providers(providers)
+    page_providers()
 elif page == "Receivers":
-    page_receivers(receivers)
+    page_receivers()
 elif page == "Food Listings":
-    page_food_listings(food_listings)
+    page_food_listings()
 elif page == "Claims":
-    page_claims(claims, food_listings, receivers)
-
+    page_claims()
+
+# Render cache debug panel (after the page, so this run's lookups are counted)
+with st.sidebar.expander("🐞 Render cache"):
+    stats = render_cache().stats()
+    lookups = stats["hits"] + stats["misses"]
+    d1, d2 = st.columns(2)
+    d1.metric("Hits", f"{stats['hits']:,}")
+    d2.metric("Misses", f"{stats['misses']:,}")
+    st.caption(f"{stats['entries']:,} / {stats['maxsize']:,} entries, TTL {stats['ttl']}s, "
+               f"hit ratio {stats['hits'] / lookups if lookups else 0:.0%}")
+    st.caption(f"Data version: {data_version}")
+    if st.button("Clear render cache"):
+        render_cache().clear()
@@ -0,0 +1,190 @@
+"""Hot/cold retention: move old claims and expired listings out of the working tables.
+
+Completed/Cancelled claims older than a window and listings expired for longer than
+a grace period (and no longer referenced by a hot claim) are moved into
+claims_archive / food_listings_archive in the same database. The summary tables
+follow the working tables, and the moved rows' contributions go to <summary>_archived
+tables (see summaries.py). Reports choose hot-only or hot+archive with
+run_queries.py --scope: "all" reads the claims_all / food_listings_all and
+<summary>_all views, which add the archive to the working tables. Matching
+(matching.py) also checks claims_all, so a listing whose claim was archived is
+not offered again.
+
+A full rebuild reloads everything from the CSVs and empties the archive. Incremental
+loads skip CSV rows whose key is archived, so the archived copy is kept as is; a new
+claim for an archived listing fails its foreign key (only long-expired listings are
+archived) and needs a full rebuild.
+
+    python archive.py --claim-days 30 --listing-days 7 --dry-run
+"""
+import argparse
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import summaries
+
+CLOSED_STATUSES = ("Completed", "Cancelled")
+DEFAULT_CLAIM_DAYS = 30
+DEFAULT_LISTING_DAYS = 7
+
+# Archived table -> key; claims first, since they reference listings
+ARCHIVED = {
+    "claims": "Claim_ID",
+    "food_listings": "Food_ID",
+}
+
+# Same columns as the working tables, without the foreign keys, plus Archived_At
+ARCHIVE_SCHEMA = {
+    "claims": """
+        CREATE TABLE IF NOT EXISTS claims_archive (
+            Claim_ID INTEGER PRIMARY KEY,
+            Food_ID INTEGER NOT NULL,
+            Receiver_ID INTEGER NOT NULL,
+            Status TEXT NOT NULL,
+            Timestamp TEXT,
+            Archived_At TEXT NOT NULL
+        )
+    """,
+    "food_listings": """
+        CREATE TABLE IF NOT EXISTS food_listings_archive (
+            Food_ID INTEGER PRIMARY KEY,
+            Food_Name TEXT NOT NULL,
+            Quantity INTEGER NOT NULL DEFAULT 0,
+            Expiry_Date TEXT,
+            Provider_ID INTEGER NOT NULL,
+            Provider_Type TEXT,
+            Location TEXT,
+            Food_Type TEXT,
+            Meal_Type TEXT,
+            Archived_At TEXT NOT NULL
+        )
+    """,
+}
+ARCHIVE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_claims_archive_food ON claims_archive(Food_ID, Status)",
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_archive_expiry ON food_listings_archive(Expiry_Date)",
+]
+COLUMNS = {
+    "claims": ["Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"],
+    "food_listings": ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type",
+                      "Location", "Food_Type", "Meal_Type"],
+}
+
+# Working or summary table -> view over hot and archived rows
+HISTORY_VIEWS = {table: f"{table}_all" for table in [*ARCHIVED, *summaries.SUMMARY_SCHEMA]}
+SCOPES = ["all", "hot"]
+
+
+def create_archive(conn):
+    """Archive tables, archived summaries and the hot+archive views (no-ops when they exist)."""
+    for table, ddl in ARCHIVE_SCHEMA.items():
+        conn.execute(ddl)
+        cols = ", ".join(COLUMNS[table])
+        conn.execute(f"CREATE VIEW IF NOT EXISTS {HISTORY_VIEWS[table]} AS "
+                     f"SELECT {cols} FROM {table} UNION ALL SELECT {cols} FROM {table}_archive")
+    for ddl in ARCHIVE_INDEXES:
+        conn.execute(ddl)
+    summaries.create_summaries(conn)
+    summaries.create_archived_summaries(conn, ARCHIVED)
+
+
+def drop_archive(conn):
+    summaries.drop_archived_summaries(conn)
+    for table in ARCHIVED:
+        conn.execute(f"DROP VIEW IF EXISTS {HISTORY_VIEWS[table]}")
+        conn.execute(f"DROP TABLE IF EXISTS {table}_archive")
+
+
+def scoped_sql(sql, scope="all"):
+    """Point a query's FROM/JOIN references to working and summary tables at the hot+archive views."""
+    if scope == "hot":
+        return sql
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(SCOPES)}")
+    names = "|".join(HISTORY_VIEWS)
+    return re.sub(rf"\b(FROM|JOIN)(\s+)({names})\b", lambda m: m[1] + m[2] + HISTORY_VIEWS[m[3]],
+                  sql, flags=re.IGNORECASE)
+
+
+def _move(conn, table, where, params, archived_at):
+    cols = ", ".join(COLUMNS[table])
+    conn.execute(f"INSERT INTO {table}_archive ({cols}, Archived_At) "
+                 f"SELECT {cols}, ? FROM {table} WHERE {where}", [archived_at, *params])
+    return conn.execute(f"DELETE FROM {table} WHERE {where}", params).rowcount
+
+
+def archive(db_path, as_of=None, claim_days=DEFAULT_CLAIM_DAYS, listing_days=DEFAULT_LISTING_DAYS,
+            dry_run=False):
+    """Move closed claims and expired listings older than the windows; returns counts and timing.
+
+    `as_of` defaults to the latest claim timestamp, the "current time" of the data.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    started = time.perf_counter()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        create_archive(conn)
+        as_of = as_of or conn.execute("SELECT MAX(Timestamp) FROM claims_all").fetchone()[0] \
+            or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        archived_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+        # Triggers move each row's contributions from the summaries to the archived summaries
+        marks = ", ".join("?" * len(CLOSED_STATUSES))
+        moved = {
+            "claims": _move(conn, "claims",
+                            f"Status IN ({marks}) AND Timestamp < datetime(?, ?)",
+                            [*CLOSED_STATUSES, as_of, f"-{int(claim_days)} days"], archived_at),
+            # Listings still referenced by a hot claim (e.g. Pending) stay hot
+            "food_listings": _move(conn, "food_listings",
+                                   "Expiry_Date < date(?, ?) AND NOT EXISTS "
+                                   "(SELECT 1 FROM claims c WHERE c.Food_ID = food_listings.Food_ID)",
+                                   [as_of, f"-{int(listing_days)} days"], archived_at),
+        }
+        conn.execute("ROLLBACK" if dry_run else "COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return {"as_of": as_of, "moved": moved, "seconds": time.perf_counter() - started, "dry_run": dry_run}
+
+
+def table_sizes(db_path):
+    """{table: (hot rows, archived rows)}."""
+    conn = sqlite3.connect(db_path)
+    try:
+        create_archive(conn)
+        return {table: (conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0],
+                        conn.execute(f"SELECT COUNT(*) FROM {table}_archive").fetchone()[0])
+                for table in ARCHIVED}
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    from build_db import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Archive old claims and expired listings.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--as-of", help="reference time (default: latest claim timestamp)")
+    parser.add_argument("--claim-days", type=int, default=DEFAULT_CLAIM_DAYS,
+                        help="archive Completed/Cancelled claims older than this many days")
+    parser.add_argument("--listing-days", type=int, default=DEFAULT_LISTING_DAYS,
+                        help="archive listings expired more than this many days ago")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move, change nothing")
+    args = parser.parse_args(argv)
+    result = archive(args.db, args.as_of, args.claim_days, args.listing_days, args.dry_run)
+    moved = ", ".join(f"{n:,} {table}" for table, n in result["moved"].items())
+    print(f"As of {result['as_of']}: {'would move' if args.dry_run else 'moved'} {moved} "
+          f"({result['seconds']:.2f}s)")
+    for table, (hot, cold) in table_sizes(args.db).items():
+        print(f"  {table:<14} {hot:>10,} hot {cold:>10,} archived")
+
+
+if __name__ == "__main__":
+    main()
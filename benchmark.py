@@ -0,0 +1,223 @@
+"""Benchmark ingest, report queries and dashboard query paths on synthetic data.
+
+    python benchmark.py --scale 100 --out bench/scale100.json
+    python benchmark.py --scale 100 --compare bench/scale100.json
+
+Results are written as JSON so runs can be diffed for regressions.
+"""
+import argparse
+import csv
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import build_db
+import data_layer as dl
+import frames
+import generate_data
+import matching
+import run_queries
+import snapshots
+import summaries
+
+
+def timed(fn, repeat=5):
+    """Median wall time of `repeat` calls, in seconds."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def dashboard_paths():
+    """The query work behind each dashboard page, with representative filters."""
+    cities = dl.distinct_values("providers", "City")[:10]
+    lo, hi = dl.min_max("claims", "Timestamp")
+    claim_range = (lo[:10], hi[:10]) if lo and hi else None
+    lo, hi = dl.min_max("food_listings", "Expiry_Date")
+    expiry_range = (lo, hi) if lo and hi else None
+
+    def overview():
+        for table in ("providers", "receivers", "food_listings", "claims"):
+            dl.count_rows(table)
+        dl.providers_receivers_by_city()
+        dl.count_by_bucket("claims", "day")
+        dl.quantity_by_food_type()
+
+    def providers():
+        where, params = dl.build_where(isin={"City": cities}, search=("providers", "Name", "mil"))
+        dl.count_rows("providers", where, params)
+        dl.fetch_page("providers", where, params, key="Provider_ID")
+        dl.count_by("providers", "Type", where, params)
+        dl.count_by("providers", "City", where, params)
+
+    def receivers():
+        where, params = dl.build_where(isin={"Type": ["NGO", "Shelter"]}, search=("receivers", "Name", "ra"))
+        dl.count_rows("receivers", where, params)
+        dl.fetch_page("receivers", where, params, key="Receiver_ID")
+        dl.count_by("receivers", "Type", where, params)
+        dl.count_by("receivers", "City", where, params)
+
+    def food_listings():
+        where, params = dl.build_where(isin={"Food_Type": ["Vegan"], "Meal_Type": ["Lunch", "Dinner"]},
+                                       search=("food_listings", "Food_Name", "ric"),
+                                       between={"Expiry_Date": expiry_range})
+        dl.count_rows("food_listings", where, params)
+        dl.fetch_page("food_listings", where, params, key="Food_ID")
+        dl.count_by("food_listings", "Food_Type", where, params)
+        dl.count_by_day("food_listings", "Expiry_Date", where, params)
+        dl.sum_by("food_listings", "Food_Type", "Quantity", where, params)
+
+    def claims():
+        filters = dict(isin={"Status": ["Completed", "Pending"]}, between={"Timestamp": claim_range})
+        where, params = dl.build_where(**filters)
+        dl.count_rows("claims", where, params)
+        dl.fetch_page("claims", where, params, key="Claim_ID")
+        dl.count_by_bucket("claims", "day", isin=filters["isin"], between=claim_range)
+        c_where, c_params = dl.build_where(**filters, alias="c")
+        dl.claims_per_provider(c_where, c_params)
+        dl.top_receivers_completed(c_where, c_params)
+
+    return {"overview": overview, "providers": providers, "receivers": receivers,
+            "food_listings": food_listings, "claims": claims}
+
+
+def change_first_row(path, column, change):
+    """Rewrite `column` of the first data row of a CSV in place."""
+    with open(path, newline="") as fh:
+        rows = list(csv.reader(fh))
+    index = rows[0].index(column)
+    rows[1][index] = change(rows[1][index])
+    with open(path, "w", newline="") as fh:
+        csv.writer(fh).writerows(rows)
+
+
+def incremental_check(db_path, files):
+    """Upsert changed rows with an incremental build and check the summaries against a recompute.
+
+    A changed claim Status is followed by the triggers; a changed listing Quantity marks
+    the summaries stale and the build refreshes them.
+    """
+    changes = {
+        "claim_status": ("claims", "Status", lambda s: "Cancelled" if s != "Cancelled" else "Completed"),
+        "listing_quantity": ("food_listings", "Quantity", lambda q: str(int(q) + 1)),
+    }
+    results = {}
+    for name, (table, column, change) in changes.items():
+        change_first_row(files[table], column, change)
+        t0 = time.perf_counter()
+        build_db.build(db_path, files=files, incremental=True)
+        results[f"{name}_seconds"] = time.perf_counter() - t0
+        conn = sqlite3.connect(db_path)
+        try:
+            drifted = summaries.summary_drift(conn)
+        finally:
+            conn.close()
+        if drifted:
+            raise RuntimeError(f"summaries out of step after an incremental {name} change: {', '.join(drifted)}")
+    return results
+
+
+def run(scale, work_dir, repeat=5, seed=42):
+    work_dir = Path(work_dir)
+    results = {
+        "scale": scale,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                        "platform": platform.platform()},
+    }
+
+    t0 = time.perf_counter()
+    files = generate_data.generate(work_dir / "csv", scale, seed)
+    results["generate_seconds"] = time.perf_counter() - t0
+
+    db_path = work_dir / "bench.db"
+    results["ingest"] = build_db.build(db_path, files=files)
+    results["rows"] = {t: s["rows"] for t, s in results["ingest"]["tables"].items()}
+    results["incremental"] = incremental_check(db_path, files)
+
+    # Whole-table frame loads: CSV parsing vs the memory-mapped columnar snapshot
+    snapshot_dir = work_dir / "snapshots"
+    t0 = time.perf_counter()
+    snapshots.write_snapshots(db_path, snapshot_dir)
+    results["snapshot_seconds"] = time.perf_counter() - t0
+    results["frames"] = {}
+    for table, path in files.items():
+        results["frames"][f"{table}.csv"] = timed(lambda t=table, p=path: snapshots.load_csv(t, path=p), repeat)
+        results["frames"][f"{table}.snapshot"] = timed(
+            lambda t=table: snapshots.load_snapshot(t, snapshot_dir=snapshot_dir, db_path=db_path), repeat)
+    results["memory"] = frames.compare_memory(snapshot_dir=snapshot_dir, db_path=db_path).to_dict("records")
+
+    dl.use_database(db_path)
+    results["reports"] = {
+        q["title"]: timed(lambda q=q: run_queries.run_reports([q], db_path=db_path, workers=1, use_cache=False),
+                          repeat)
+        for q in run_queries.queries
+    }
+    results["dashboard"] = {name: timed(fn, repeat) for name, fn in dashboard_paths().items()}
+
+    # Last, since it writes claims: match every open listing regardless of expiry
+    results["matching"] = matching.run(db_path, horizon_days=30, max_per_receiver=None)
+    return results
+
+
+def compare(current, baseline, out=sys.stdout):
+    """Print current vs baseline timings; ratios above 1 are slower."""
+    print(f"{'section':<10} {'name':<46} {'baseline':>10} {'current':>10} {'ratio':>7}", file=out)
+    for section in ("reports", "dashboard", "frames"):
+        for name, cur in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if base is None:
+                continue
+            ratio = cur / base if base else float("inf")
+            flag = "  <-- slower" if ratio > 1.5 else ""
+            print(f"{section:<10} {name[:46]:<46} {base * 1000:>8.2f}ms {cur * 1000:>8.2f}ms {ratio:>6.2f}x{flag}",
+                  file=out)
+    base_rate = baseline.get("matching", {}).get("listings_per_second")
+    if base_rate and "matching" in current:
+        cur_rate = current["matching"]["listings_per_second"]
+        print(f"{'matching':<10} {'listings/s':<46} {base_rate:>10,.0f} {cur_rate:>10,.0f} "
+              f"{base_rate / cur_rate if cur_rate else float('inf'):>6.2f}x", file=out)
+    base_ingest = baseline.get("ingest", {}).get("total_seconds")
+    if base_ingest:
+        cur_ingest = current["ingest"]["total_seconds"]
+        print(f"{'ingest':<10} {'total':<46} {base_ingest:>9.2f}s {cur_ingest:>9.2f}s "
+              f"{cur_ingest / base_ingest:>6.2f}x", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the food waste queries on synthetic data.")
+    parser.add_argument("--scale", type=float, default=10, help="multiple of the shipped row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per query (median is kept)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", type=Path, help="where to keep generated CSVs and the database")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    if args.work_dir:
+        results = run(args.scale, args.work_dir, args.repeat, args.seed)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run(args.scale, tmp, args.repeat, args.seed)
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.out}")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+    elif not args.out:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
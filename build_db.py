@@ -1,13 +1,28 @@
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import io
+import os
 import sqlite3
+import time
+from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
 
+import archive
+import changes
+import search
+import summaries
+
 # Paths
 BASE_DIR = Path(__file__).resolve().parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = BASE_DIR
 DB_PATH = BASE_DIR / "food_waste.db"
 
-# CSV files and table names mapping
+# Rows per executemany() batch while streaming the CSVs
+DEFAULT_CHUNKSIZE = 50_000
+
+# CSV files and table names mapping (parents before children for foreign keys)
 csv_files = {
     "providers": DATA_DIR / "providers_data.csv",
     "receivers": DATA_DIR / "receivers_data.csv",
@@ -15,33 +30,469 @@ csv_files = {
     "claims": DATA_DIR / "claims_data.csv"
 }
 
-# Connect to SQLite
-conn = sqlite3.connect(DB_PATH)
-conn.execute("PRAGMA foreign_keys = ON;")
-
-# Drop tables if they already exist (for rebuild purposes)
-for table in csv_files.keys():
-    conn.execute(f"DROP TABLE IF EXISTS {table}")
-
-# Function to create table dynamically based on CSV columns
-def create_table_from_df(table_name, df):
-    col_defs = []
-    for col in df.columns:
-        if col.endswith("_ID"):
-            col_defs.append(f"{col} INTEGER")
-        else:
-            col_defs.append(f"{col} TEXT")
-    schema = f"CREATE TABLE {table_name} ({', '.join(col_defs)})"
-    conn.execute(schema)
-
-# Read CSVs, create matching tables, and insert data
-for table_name, file_path in csv_files.items():
-    df = pd.read_csv(file_path)
-    create_table_from_df(table_name, df)
-    df.to_sql(table_name, conn, if_exists="append", index=False)
-
-# Commit & close
-conn.commit()
-conn.close()
-
-print(f"Database created successfully at: {DB_PATH}")
+# Declared schema: typed columns, primary keys and foreign keys
+SCHEMA = {
+    "providers": """
+        CREATE TABLE IF NOT EXISTS providers (
+            Provider_ID INTEGER PRIMARY KEY,
+            Name TEXT NOT NULL,
+            Type TEXT,
+            Address TEXT,
+            City TEXT,
+            Contact TEXT
+        )
+    """,
+    "receivers": """
+        CREATE TABLE IF NOT EXISTS receivers (
+            Receiver_ID INTEGER PRIMARY KEY,
+            Name TEXT NOT NULL,
+            Type TEXT,
+            City TEXT,
+            Contact TEXT
+        )
+    """,
+    "food_listings": """
+        CREATE TABLE IF NOT EXISTS food_listings (
+            Food_ID INTEGER PRIMARY KEY,
+            Food_Name TEXT NOT NULL,
+            Quantity INTEGER NOT NULL DEFAULT 0 CHECK (Quantity >= 0),
+            Expiry_Date TEXT,
+            Provider_ID INTEGER NOT NULL REFERENCES providers(Provider_ID),
+            Provider_Type TEXT,
+            Location TEXT,
+            Food_Type TEXT,
+            Meal_Type TEXT
+        )
+    """,
+    "claims": """
+        CREATE TABLE IF NOT EXISTS claims (
+            Claim_ID INTEGER PRIMARY KEY,
+            Food_ID INTEGER NOT NULL REFERENCES food_listings(Food_ID),
+            Receiver_ID INTEGER NOT NULL REFERENCES receivers(Receiver_ID),
+            Status TEXT NOT NULL,
+            Timestamp TEXT
+        )
+    """,
+}
+
+# CSV date formats (3/17/2025, 3/5/2025 5:26) are parsed once at load time into
+# sortable ISO-8601 text, so range filters and ORDER BY can use the indexes
+def to_iso_date(value):
+    """'3/17/2025' -> '2025-03-17'. ISO input passes through; unparseable values become NULL."""
+    if value is None or "-" in value:
+        return value
+    try:
+        month, day, year = value.split("/")
+        return f"{int(year):04d}-{int(month):02d}-{int(day):02d}"
+    except ValueError:
+        return None
+
+
+def to_iso_timestamp(value):
+    """'3/5/2025 5:26' -> '2025-03-05 05:26:00'. ISO input passes through; unparseable values become NULL."""
+    if value is None or "-" in value:
+        return value
+    date_part, _, time_part = value.strip().partition(" ")
+    date = to_iso_date(date_part)
+    if date is None:
+        return None
+    try:
+        parts = [int(p) for p in time_part.split(":")] if time_part else []
+    except ValueError:
+        return None
+    hour, minute, second = (parts + [0, 0, 0])[:3]
+    return f"{date} {hour:02d}:{minute:02d}:{second:02d}"
+
+
+COLUMN_PARSERS = {
+    "food_listings": {"Expiry_Date": to_iso_date},
+    "claims": {"Timestamp": to_iso_timestamp},
+}
+
+# Upsert keys for incremental loads
+PRIMARY_KEYS = {
+    "providers": "Provider_ID",
+    "receivers": "Receiver_ID",
+    "food_listings": "Food_ID",
+    "claims": "Claim_ID",
+}
+
+# Claim_IDs from here up are reserved for claims proposed by matching.py. The CSVs never
+# use them, so an upsert cannot overwrite a proposal, and full rebuilds carry them over.
+PROPOSED_CLAIM_IDS = 1_000_000_000
+CLAIM_COLUMNS = ["Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"]
+
+# Per-source watermark: what was loaded last time, so unchanged CSVs are skipped and
+# append-only growth is read from the previous end of file
+INGEST_STATE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ingest_state (
+        table_name TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        sha256 TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        loaded_at TEXT NOT NULL
+    )
+"""
+
+# Covering indexes, chosen from the joins/filters in queries.sql and run_queries.py
+INDEXES = [
+    # Providers & receivers count per city, provider contact info for a city
+    "CREATE INDEX IF NOT EXISTS idx_providers_city ON providers(City, Provider_ID)",
+    "CREATE INDEX IF NOT EXISTS idx_receivers_city ON receivers(City, Receiver_ID)",
+    # food_listings -> providers joins, quantity donated per provider
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_provider ON food_listings(Provider_ID, Quantity)",
+    # Quantity by provider type, quantity / frequency by food type
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_provider_type ON food_listings(Provider_Type, Quantity)",
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_food_type ON food_listings(Food_Type, Quantity)",
+    # Listings expiring soon / expiry date ranges
+    "CREATE INDEX IF NOT EXISTS idx_food_listings_expiry ON food_listings(Expiry_Date)",
+    # Claims per food item (LEFT JOIN on Food_ID) and claim status per food item
+    "CREATE INDEX IF NOT EXISTS idx_claims_food ON claims(Food_ID, Status)",
+    # WHERE Status = 'Completed' reports joining to receivers and/or food_listings
+    "CREATE INDEX IF NOT EXISTS idx_claims_status ON claims(Status, Receiver_ID, Food_ID)",
+    # Claims over time / timestamp ranges
+    "CREATE INDEX IF NOT EXISTS idx_claims_timestamp ON claims(Timestamp, Status)",
+    # Foreign key lookups when receivers are updated/deleted
+    "CREATE INDEX IF NOT EXISTS idx_claims_receiver ON claims(Receiver_ID)",
+]
+
+# Pragmas for the bulk load: the database is rebuilt from the CSVs, so durability
+# during the load does not matter. WAL is restored afterwards for readers.
+# Unsafe for a database in use, so full rebuilds load a scratch file with them (see build())
+LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",   # 256 MiB
+    "PRAGMA temp_store = MEMORY",
+]
+FINAL_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+]
+# Incremental loads modify a live database, so they keep WAL and only enlarge the cache
+INCREMENTAL_PRAGMAS = FINAL_PRAGMAS + [
+    "PRAGMA cache_size = -262144",
+    "PRAGMA temp_store = MEMORY",
+]
+
+
+def iter_csv_chunks(path, chunksize=DEFAULT_CHUNKSIZE, offset=0):
+    """Yield (header, rows) from a CSV, `chunksize` rows at a time. Empty cells become NULL.
+
+    With `offset` > 0 the header is still read from the top of the file, but rows are
+    read starting at that byte offset (which must be a record boundary).
+    """
+    with open(path, newline="", encoding="utf-8") as fh:
+        header = next(csv.reader(fh))
+    with open(path, "rb") as raw:
+        if offset:
+            raw.seek(offset)
+        fh = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        reader = csv.reader(fh)
+        if not offset:
+            next(reader)
+        while True:
+            chunk = [tuple(v if v != "" else None for v in row) for row in islice(reader, chunksize)]
+            if not chunk:
+                break
+            yield header, chunk
+
+
+def insert_sql(table_name, header):
+    placeholders = ", ".join("?" for _ in header)
+    return f"INSERT INTO {table_name} ({', '.join(header)}) VALUES ({placeholders})"
+
+
+def upsert_sql(table_name, header):
+    """INSERT ... ON CONFLICT that only rewrites rows whose values actually changed."""
+    key = PRIMARY_KEYS[table_name]
+    cols = [c for c in header if c != key]
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in cols)
+    changed = " OR ".join(f"{c} IS NOT excluded.{c}" for c in cols)
+    if table_name not in archive.ARCHIVED:
+        return (f"{insert_sql(table_name, header)} "
+                f"ON CONFLICT({key}) DO UPDATE SET {assignments} WHERE {changed}")
+    # Rows already moved to the archive are not brought back
+    placeholders = ", ".join("?" for _ in header)
+    return (f"INSERT INTO {table_name} ({', '.join(header)}) "
+            f"SELECT * FROM (VALUES ({placeholders})) WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {table_name}_archive WHERE {key} = column{header.index(key) + 1}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {assignments} WHERE {changed}")
+
+
+def load_table(conn, table_name, file_path, chunksize=DEFAULT_CHUNKSIZE, upsert=False, offset=0):
+    """Stream one CSV into its table with executemany(); returns the number of rows read."""
+    total = 0
+    sql = None
+    parsers = []
+    for header, chunk in iter_csv_chunks(file_path, chunksize, offset):
+        if sql is None:
+            sql = upsert_sql(table_name, header) if upsert else insert_sql(table_name, header)
+            parsers = [(header.index(col), fn)
+                       for col, fn in COLUMN_PARSERS.get(table_name, {}).items() if col in header]
+        if parsers:
+            chunk = [list(row) for row in chunk]
+            for row in chunk:
+                for i, fn in parsers:
+                    row[i] = fn(row[i])
+        conn.executemany(sql, chunk)
+        total += len(chunk)
+    return total
+
+
+def file_digest(path, length=None):
+    """sha256 of the first `length` bytes of a file (the whole file by default)."""
+    h = hashlib.sha256()
+    remaining = length
+    with open(path, "rb") as fh:
+        while remaining is None or remaining > 0:
+            block = fh.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            h.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return h.hexdigest()
+
+
+def ends_with_newline(path, size):
+    if size == 0:
+        return True
+    with open(path, "rb") as fh:
+        fh.seek(size - 1)
+        return fh.read(1) in (b"\n", b"\r")
+
+
+def plan_incremental(conn, table_name, file_path):
+    """Decide how much of a CSV needs loading: ("skip", 0), ("append", offset) or ("full", 0)."""
+    state = conn.execute(
+        "SELECT size, mtime_ns, sha256 FROM ingest_state WHERE table_name = ?", (table_name,)
+    ).fetchone()
+    if state is None:
+        return "full", 0
+    size, mtime_ns, digest = state
+    st = os.stat(file_path)
+    if st.st_size == size and st.st_mtime_ns == mtime_ns:
+        return "skip", 0
+    if st.st_size == size and file_digest(file_path) == digest:
+        return "skip", 0
+    if st.st_size > size and ends_with_newline(file_path, size) and file_digest(file_path, size) == digest:
+        return "append", size
+    return "full", 0
+
+
+def record_watermark(conn, table_name, file_path, rows):
+    st = os.stat(file_path)
+    conn.execute(
+        """
+        INSERT INTO ingest_state (table_name, source, size, mtime_ns, sha256, rows, loaded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(table_name) DO UPDATE SET
+            source = excluded.source, size = excluded.size, mtime_ns = excluded.mtime_ns,
+            sha256 = excluded.sha256, rows = excluded.rows, loaded_at = excluded.loaded_at
+        """,
+        (table_name, str(file_path), st.st_size, st.st_mtime_ns, file_digest(file_path), rows,
+         datetime.now(timezone.utc).isoformat(timespec="seconds")),
+    )
+
+
+def build(db_path=DB_PATH, chunksize=DEFAULT_CHUNKSIZE, files=None, incremental=False):
+    """Rebuild the database from the CSVs in a single transaction.
+
+    A full rebuild loads a scratch file next to the database and then copies it over
+    the live one in one transaction, so a failure leaves the served database untouched
+    and readers never see a half-loaded one.
+
+    With `incremental=True` existing tables are kept: unchanged CSVs are skipped, files
+    that only grew are read from the previous end of file, and everything else is
+    upserted by primary key. Returns per-table row counts and timings.
+    """
+    files = files or csv_files
+    target = Path(db_path) if incremental else Path(f"{db_path}.building")
+    previous_seq, proposals = 0, []
+    if not incremental:
+        target.unlink(missing_ok=True)
+        previous_seq = live_seq(db_path)
+        proposals = proposed_claims(db_path)
+    conn = sqlite3.connect(target, isolation_level=None)
+    for pragma in (INCREMENTAL_PRAGMAS if incremental else LOAD_PRAGMAS):
+        conn.execute(pragma)
+    conn.execute("PRAGMA foreign_keys = ON;")
+
+    started = time.perf_counter()
+    stats = {"tables": {}}
+    try:
+        _load(conn, files, chunksize, incremental, stats, previous_seq, proposals)
+        if not incremental:
+            publish(conn, db_path)
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+        if not incremental:
+            target.unlink(missing_ok=True)
+
+    stats["total_seconds"] = time.perf_counter() - started
+    print(f"Database {'updated' if incremental else 'created'} successfully at: {db_path} "
+          f"({stats['total_seconds']:.2f}s)")
+    return stats
+
+
+def live_seq(db_path):
+    """Latest change-log Seq of an existing database (0 if there is none)."""
+    if not Path(db_path).exists():
+        return 0
+    live = sqlite3.connect(db_path)
+    try:
+        return changes.latest_seq(live)
+    finally:
+        live.close()
+
+
+def proposed_claims(db_path):
+    """Claims in the reserved Claim_ID range of an existing database, hot and archived."""
+    if not Path(db_path).exists():
+        return []
+    live = sqlite3.connect(db_path)
+    try:
+        tables = {r[0] for r in live.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return [row for table in ("claims", "claims_archive") if table in tables
+                for row in live.execute(f"SELECT {', '.join(CLAIM_COLUMNS)} FROM {table} WHERE Claim_ID >= ?",
+                                        (PROPOSED_CLAIM_IDS,))]
+    finally:
+        live.close()
+
+
+def publish(conn, db_path):
+    """Copy a freshly built database over `db_path` in one write transaction.
+
+    The backup API goes through the destination's own journal (WAL), so open readers
+    keep their snapshot until it commits and then see the new data.
+    """
+    t0 = time.perf_counter()
+    dest = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.backup(dest)
+        for pragma in FINAL_PRAGMAS:
+            dest.execute(pragma)
+    finally:
+        dest.close()
+    print(f"  {'publish':<14} {'':>10} copied {time.perf_counter() - t0:7.2f}s")
+
+
+def _load(conn, files, chunksize, incremental, stats, previous_seq=0, proposals=()):
+    conn.execute("BEGIN")
+    conn.execute(INGEST_STATE_SCHEMA)
+
+    # Summary tables are kept current by triggers while they are fresh; otherwise the
+    # triggers are dropped for the load and the summaries recomputed in one pass after it
+    summaries.create_summaries(conn)
+    maintain_summaries = incremental and not summaries.summaries_stale(conn)
+    if maintain_summaries:
+        summaries.install_triggers(conn)
+    else:
+        summaries.drop_triggers(conn)
+
+    # Incremental loads go through the change feed row by row; a full rebuild is one reset
+    if incremental:
+        for table in changes.TRACKED:
+            conn.execute(SCHEMA[table])
+        archive.create_archive(conn)
+        fresh_log = changes.latest_seq(conn) == 0
+        changes.install(conn)
+        if fresh_log:
+            changes.mark_reset(conn)
+
+    # Stream CSVs into the declared tables
+    for table_name, file_path in files.items():
+        conn.execute(SCHEMA[table_name])
+        mode, offset = plan_incremental(conn, table_name, file_path) if incremental else ("full", 0)
+        if mode == "skip":
+            stats["tables"][table_name] = {"mode": mode, "rows": 0, "seconds": 0.0}
+            print(f"  {table_name:<14} unchanged, skipped")
+            continue
+        t0 = time.perf_counter()
+        rows = load_table(conn, table_name, file_path, chunksize, upsert=incremental, offset=offset)
+        elapsed = time.perf_counter() - t0
+        total = rows
+        if mode == "append":
+            total += conn.execute(
+                "SELECT rows FROM ingest_state WHERE table_name = ?", (table_name,)
+            ).fetchone()[0]
+        record_watermark(conn, table_name, file_path, total)
+        stats["tables"][table_name] = {"mode": mode, "rows": rows, "seconds": elapsed}
+        print(f"  {table_name:<14} {rows:>10,} rows  {elapsed:7.2f}s  "
+              f"{rows / max(elapsed, 1e-9):>12,.0f} rows/s  ({mode})")
+
+    # Proposed claims are not in the CSVs; keep those whose listing and receiver still exist
+    if proposals:
+        before = conn.total_changes
+        conn.executemany(
+            f"INSERT OR IGNORE INTO claims ({', '.join(CLAIM_COLUMNS)}) SELECT ?1, ?2, ?3, ?4, ?5 "
+            "WHERE EXISTS (SELECT 1 FROM food_listings WHERE Food_ID = ?2) "
+            "AND EXISTS (SELECT 1 FROM receivers WHERE Receiver_ID = ?3)",
+            proposals,
+        )
+        stats["proposals"] = conn.total_changes - before
+        print(f"  {'proposals':<14} {stats['proposals']:>10,} rows  kept")
+
+    # Archive tables (empty after a full rebuild), archived summaries and history views
+    archive.create_archive(conn)
+
+    # Build indexes only once the data is in, then refresh planner stats
+    t0 = time.perf_counter()
+    for ddl in INDEXES:
+        conn.execute(ddl)
+    conn.execute("PRAGMA optimize;" if incremental else "ANALYZE;")
+    stats["indexes_seconds"] = time.perf_counter() - t0
+    print(f"  {'indexes':<14} {len(INDEXES):>10} ready {time.perf_counter() - t0:7.2f}s")
+
+    # Materialized aggregates for the Overview page and reports
+    if not maintain_summaries or summaries.summaries_stale(conn):
+        t0 = time.perf_counter()
+        summaries.refresh_summaries(conn)
+        stats["summaries_seconds"] = time.perf_counter() - t0
+        print(f"  {'summaries':<14} {len(summaries.SUMMARY_SCHEMA):>10} built {time.perf_counter() - t0:7.2f}s")
+
+    # Full-text indexes for name/address search; triggers keep them current between builds
+    if not incremental or not all(search.fts_exists(conn, t) for t in search.FTS_TABLES):
+        t0 = time.perf_counter()
+        search.rebuild_indexes(conn)
+        stats["search_seconds"] = time.perf_counter() - t0
+        print(f"  {'search':<14} {len(search.FTS_TABLES):>10} built {time.perf_counter() - t0:7.2f}s")
+
+    if not incremental:
+        # Continue the replaced database's sequence so live readers see the reset
+        changes.mark_reset(conn, after=previous_seq)
+        changes.install(conn)
+    changes.prune_changes(conn)
+
+    conn.execute("COMMIT")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build food_waste.db from the CSV exports.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="rows per executemany() batch")
+    parser.add_argument("--incremental", action="store_true",
+                        help="upsert new/changed rows only, skipping CSVs unchanged since the last load")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="also write columnar snapshots (needs pyarrow) for fast frame loading")
+    args = parser.parse_args(argv)
+    build(args.db, args.chunksize, incremental=args.incremental)
+    if args.snapshot:
+        import snapshots  # imports data_layer, which imports this module
+
+        t0 = time.perf_counter()
+        counts = snapshots.write_snapshots(args.db)
+        print(f"Snapshots written to {snapshots.SNAPSHOT_DIR} ({sum(counts.values()):,} rows, "
+              f"{time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Change feed for claims and food listings.
+
+Triggers append one change_log row per inserted, updated or deleted row, and the
+log's Seq is a monotonically increasing version counter: a reader remembers the
+last Seq it applied, polls MAX(Seq) (an index lookup) and fetches only the rows
+changed since. A full rebuild logs a single reset marker instead of every row,
+and pruning the log past a reader's watermark also tells it to reload.
+
+    python changes.py --since 0
+"""
+import argparse
+import sqlite3
+
+# Tracked table -> primary key
+TRACKED = {
+    "claims": "Claim_ID",
+    "food_listings": "Food_ID",
+}
+RESET = "*"
+
+# Entries kept by prune_changes(); readers further behind than this reload in full
+KEEP_CHANGES = 100_000
+
+CHANGE_LOG_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS change_log (
+        Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        Table_Name TEXT NOT NULL,
+        Row_ID INTEGER,
+        Op TEXT NOT NULL CHECK (Op IN ('I', 'U', 'D', 'R')),
+        Changed_At TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    )
+"""
+
+
+def trigger_sql(table):
+    key = TRACKED[table]
+    log = "INSERT INTO change_log (Table_Name, Row_ID, Op) VALUES"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_log_ins AFTER INSERT ON {table} "
+        f"BEGIN {log} ('{table}', new.{key}, 'I'); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_log_del AFTER DELETE ON {table} "
+        f"BEGIN {log} ('{table}', old.{key}, 'D'); END",
+        # A changed key is a delete of the old row and an insert of the new one
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_log_upd AFTER UPDATE ON {table} "
+        f"BEGIN {log} ('{table}', old.{key}, CASE WHEN old.{key} = new.{key} THEN 'U' ELSE 'D' END); "
+        f"INSERT INTO change_log (Table_Name, Row_ID, Op) "
+        f"SELECT '{table}', new.{key}, 'I' WHERE old.{key} <> new.{key}; END",
+    ]
+
+
+def drop_triggers(conn):
+    for table in TRACKED:
+        for op in ("ins", "del", "upd"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_log_{op}")
+
+
+def install(conn):
+    """Create the log and the triggers on every tracked table."""
+    conn.execute(CHANGE_LOG_SCHEMA)
+    for table in TRACKED:
+        for ddl in trigger_sql(table):
+            conn.execute(ddl)
+
+
+def mark_reset(conn, after=0):
+    """Record that the tracked tables were replaced wholesale (full rebuild).
+
+    `after` is the latest Seq of the database being replaced; the marker is numbered
+    past it so the version keeps increasing across the swap.
+    """
+    conn.execute(CHANGE_LOG_SCHEMA)
+    if after > latest_seq(conn):
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'change_log'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_log', ?)", (after,))
+    conn.execute("INSERT INTO change_log (Table_Name, Row_ID, Op) VALUES (?, NULL, 'R')", (RESET,))
+
+
+def prune_changes(conn, keep=KEEP_CHANGES):
+    """Drop all but the newest `keep` entries; returns the number removed."""
+    latest = latest_seq(conn)
+    return conn.execute("DELETE FROM change_log WHERE Seq <= ?", (latest - keep,)).rowcount
+
+
+def latest_seq(conn):
+    """The current version: the last Seq written (0 for an empty or missing log)."""
+    try:
+        return conn.execute("SELECT MAX(Seq) FROM change_log").fetchone()[0] or 0
+    except sqlite3.OperationalError:  # no log yet (database built before the feed existed)
+        return 0
+
+
+def changes_since(conn, since):
+    """Net changes after Seq `since`.
+
+    Returns (latest seq, {table: (upserted ids, deleted ids)}) or (latest seq, None)
+    when the reader must reload in full: a rebuild happened or the entries it needs
+    were pruned. A row changed several times is reported once, by its last operation.
+    """
+    latest = latest_seq(conn)
+    if latest <= since:
+        return latest, {}
+    oldest = conn.execute("SELECT MIN(Seq) FROM change_log").fetchone()[0]
+    reset = conn.execute(
+        "SELECT 1 FROM change_log WHERE Seq > ? AND Op = 'R' LIMIT 1", (since,)
+    ).fetchone()
+    if reset or oldest is None or oldest > since + 1:
+        return latest, None
+    last_op = {}
+    for table, row_id, op in conn.execute(
+        "SELECT Table_Name, Row_ID, Op FROM change_log WHERE Seq > ? AND Seq <= ? ORDER BY Seq",
+        (since, latest),
+    ):
+        last_op[(table, row_id)] = op
+    changed = {table: (set(), set()) for table in TRACKED}
+    for (table, row_id), op in last_op.items():
+        upserted, deleted = changed[table]
+        (deleted if op == "D" else upserted).add(row_id)
+    return latest, {table: (sorted(up), sorted(dele)) for table, (up, dele) in changed.items() if up or dele}
+
+
+def main(argv=None):
+    from data_layer import get_connection
+
+    parser = argparse.ArgumentParser(description="Show rows changed since a change-log sequence number.")
+    parser.add_argument("--since", type=int, default=0, help="last sequence number already applied")
+    args = parser.parse_args(argv)
+    latest, changed = changes_since(get_connection(), args.since)
+    if changed is None:
+        print(f"Full reload needed (latest seq {latest})")
+        return
+    print(f"Latest seq {latest}")
+    for table, (upserted, deleted) in changed.items():
+        print(f"  {table:<14} {len(upserted):>8,} inserted/updated  {len(deleted):>8,} deleted")
+
+
+if __name__ == "__main__":
+    main()
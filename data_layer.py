@@ -0,0 +1,308 @@
+import sqlite3
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+
+import search as fts
+from build_db import DB_PATH
+
+# Rows shipped to st.dataframe per page; charts use aggregates instead of raw rows
+DEFAULT_PAGE_SIZE = 50
+
+# Time-bucket rollups maintained by build_db.py: table -> (bucket table, measure, key columns)
+TIME_BUCKETS = {
+    "claims": ("claim_time_buckets", "Claims", ["Status", "City", "Food_Type"]),
+    "food_listings": ("expiry_buckets", "Listings", ["City", "Food_Type"]),
+}
+
+_local = threading.local()
+_db_path = DB_PATH
+
+
+# =========================
+# Connections
+# =========================
+def connect_readonly(db_path=DB_PATH):
+    """Open a read-only connection; the dashboard never writes."""
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def use_database(db_path):
+    """Point the module-level helpers at another database (benchmarks, tests)."""
+    global _db_path
+    _db_path = Path(db_path)
+
+
+def get_connection(db_path=None):
+    """One read-only connection per thread (Streamlit runs each session in its own thread)."""
+    db_path = db_path or _db_path
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    key = str(db_path)
+    if key not in conns:
+        conns[key] = connect_readonly(db_path)
+    return conns[key]
+
+
+def database_version(db_path=None):
+    """Changes whenever a write is committed to the database (main file or WAL).
+
+    Used as the invalidation key for cached query results.
+    """
+    db_path = db_path or _db_path
+    parts = []
+    for path in (Path(db_path), Path(f"{db_path}-wal")):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            st = None
+        # An empty WAL (left behind by readers) holds no committed data
+        parts.append(f"{st.st_size}:{st.st_mtime_ns}" if st and st.st_size else "-")
+    return "/".join(parts)
+
+
+def query_df(sql, params=(), conn=None):
+    return pd.read_sql_query(sql, conn or get_connection(), params=list(params))
+
+
+def query_scalar(sql, params=(), conn=None):
+    row = (conn or get_connection()).execute(sql, list(params)).fetchone()
+    return row[0] if row else None
+
+
+# =========================
+# Filter push-down
+# =========================
+def selected(values, options):
+    """A multiselect value as a filter: None when nothing or everything is selected (no-op)."""
+    if not values or set(values) >= set(options):
+        return None
+    return list(values)
+
+
+def build_where(isin=None, contains=None, between=None, equals=None, search=None, alias=None):
+    """Turn dashboard filters into a parameterized WHERE clause.
+
+    isin:     {column: [values]}          -> column IN (?, ...)
+    contains: {column: text}              -> column LIKE '%text%' (case-insensitive)
+    between:  {column: (start, end)}      -> start <= column < end + 1 day (ISO dates)
+    equals:   {column: value}             -> column = ?
+    search:   (table, column, text)       -> column contains text, via the FTS index
+    Empty/None values are skipped. Returns (sql, params), sql is "" when nothing applies.
+    """
+    prefix = f"{alias}." if alias else ""
+    clauses, params = [], []
+    for col, values in (isin or {}).items():
+        if values:
+            clauses.append(f"{prefix}{col} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    for col, text in (contains or {}).items():
+        if text:
+            clauses.append(f"{prefix}{col} LIKE ? ESCAPE '\\'")
+            params.append(f"%{fts.escape_like(text)}%")
+    for col, bounds in (between or {}).items():
+        if bounds and len(bounds) == 2 and bounds[0] is not None and bounds[1] is not None:
+            clauses.append(f"{prefix}{col} >= ? AND {prefix}{col} < date(?, '+1 day')")
+            params.extend([str(bounds[0]), str(bounds[1])])
+    for col, value in (equals or {}).items():
+        if value is not None:
+            clauses.append(f"{prefix}{col} = ?")
+            params.append(value)
+    if search and search[2]:
+        clause, search_params = fts.match_clause(*search, alias=alias)
+        clauses.append(clause)
+        params.extend(search_params)
+    sql = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return sql, params
+
+
+# =========================
+# Generic table queries
+# =========================
+def distinct_values(table, column):
+    rows = get_connection().execute(
+        f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY {column}"
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def min_max(table, column):
+    return get_connection().execute(f"SELECT MIN({column}), MAX({column}) FROM {table}").fetchone()
+
+
+def count_rows(table, where="", params=()):
+    return query_scalar(f"SELECT COUNT(*) FROM {table}{where}", params)
+
+
+def table_columns(table):
+    return [row[1] for row in get_connection().execute(f"PRAGMA table_info({table})")]
+
+
+def fetch_page(table, where="", params=(), key=None, sort=None, descending=False, after=None,
+               limit=DEFAULT_PAGE_SIZE):
+    """One page of filtered rows by keyset pagination, ordered by `sort` then `key`.
+
+    `after` is page_cursor() of the previous page (None for the first page). Each page
+    seeks on the ORDER BY index, with a (sort, key) row-value comparison, instead of an
+    OFFSET that reads and discards every earlier row. NULL sort values come first
+    ascending and last descending, as SQLite orders them; they are read as a separate
+    run ordered by key, so the seek never has to compare against NULL.
+    """
+    sort = sort or key
+    direction, cmp = ("DESC", "<") if descending else ("ASC", ">")
+
+    def run(cond, seek, order, n):
+        sql_where = f"{where} AND {cond}" if where else f" WHERE {cond}"
+        return query_df(f"SELECT * FROM {table}{sql_where} ORDER BY {order} LIMIT ?",
+                        list(params) + seek + [n])
+
+    if sort == key:
+        cond, seek = (f"{key} {cmp} ?", [after]) if after is not None else ("1", [])
+        return run(cond, seek, f"{key} {direction}", limit)
+
+    value, last_key = after if after is not None else (None, None)
+    in_nulls = after is not None and value is None
+
+    def values_run(n):
+        if after is None or in_nulls:
+            return run(f"{sort} IS NOT NULL", [], f"{sort} {direction}, {key} {direction}", n)
+        return run(f"({sort}, {key}) {cmp} (?, ?)", [value, last_key],
+                   f"{sort} {direction}, {key} {direction}", n)
+
+    def nulls_run(n):
+        cond, seek = (f"{sort} IS NULL AND {key} {cmp} ?", [last_key]) if in_nulls else (f"{sort} IS NULL", [])
+        return run(cond, seek, f"{key} {direction}", n)
+
+    # Ascending: the NULL run, then values; descending: values, then the NULL run
+    runs = [nulls_run, values_run] if not descending else [values_run, nulls_run]
+    if after is not None and (in_nulls != (runs[0] is nulls_run)):
+        runs = runs[1:]
+    parts = []
+    for fetch in runs:
+        part = fetch(limit - sum(len(p) for p in parts))
+        parts.append(part)
+        if sum(len(p) for p in parts) >= limit:
+            break
+    return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+def page_cursor(page, key, sort=None):
+    """The `after` value continuing from the last row of `page` (None when it is empty)."""
+    if page.empty:
+        return None
+    last = page.iloc[-1]
+    value = lambda v: None if pd.isna(v) else (v.item() if hasattr(v, "item") else v)
+    sort = sort or key
+    return value(last[key]) if sort == key else (value(last[sort]), value(last[key]))
+
+
+def count_by(table, column, where="", params=(), count_col="count"):
+    return query_df(
+        f"SELECT {column}, COUNT(*) AS {count_col} FROM {table}{where} "
+        f"GROUP BY {column} ORDER BY {count_col} DESC",
+        params,
+    )
+
+
+def sum_by(table, column, value, where="", params=()):
+    return query_df(
+        f"SELECT {column}, SUM({value}) AS {value} FROM {table}{where} "
+        f"GROUP BY {column} ORDER BY {value} DESC",
+        params,
+    )
+
+
+def count_by_day(table, column, where="", params=(), count_col="count"):
+    """Per-day counts of an ISO date/timestamp column, for time charts."""
+    cond = f"{where} AND {column} IS NOT NULL" if where else f" WHERE {column} IS NOT NULL"
+    return query_df(
+        f"SELECT substr({column}, 1, 10) AS Date, COUNT(*) AS {count_col} FROM {table}{cond} "
+        f"GROUP BY Date ORDER BY Date",
+        params,
+    )
+
+
+def count_by_bucket(table, grain="day", isin=None, between=None, count_col="count"):
+    """Per-bucket counts (hour/day/week) for time charts, from the rollup tables.
+
+    Reads one row per bucket and key combination instead of every claim/listing.
+    `isin` may only use the rollup's key columns (TIME_BUCKETS); `between` is an ISO
+    date range, widened to whole weeks for the weekly grain. Columns: Date, count_col.
+    """
+    summary, measure, keys = TIME_BUCKETS[table]
+    unknown = set(isin or {}) - set(keys)
+    if unknown:
+        raise ValueError(f"{summary} cannot filter on {', '.join(sorted(unknown))}")
+    if between and grain == "week" and between[0] is not None:
+        start = pd.Timestamp(between[0])
+        between = ((start - timedelta(days=start.weekday())).date().isoformat(), between[1])
+    where, params = build_where(isin=isin, between={"Bucket": between}, equals={"Grain": grain})
+    return query_df(
+        f"SELECT Bucket AS Date, SUM({measure}) AS {count_col} FROM {summary}{where} "
+        f"GROUP BY Bucket ORDER BY Bucket",
+        params,
+    )
+
+
+# =========================
+# Dashboard-specific aggregates
+# =========================
+def providers_receivers_by_city():
+    """From the city_summary table maintained by build_db.py."""
+    return query_df(
+        """
+        SELECT City, Providers, Receivers
+        FROM city_summary
+        WHERE Providers > 0 OR Receivers > 0
+        ORDER BY City
+        """
+    )
+
+
+def quantity_by_food_type():
+    """From the food_type_summary table maintained by build_db.py."""
+    return query_df(
+        """
+        SELECT Food_Type, Listed_Quantity AS Quantity
+        FROM food_type_summary
+        ORDER BY Quantity DESC
+        """
+    )
+
+
+def claims_per_provider(where="", params=()):
+    """`where` must be built with alias="c"."""
+    return query_df(
+        f"""
+        SELECT fl.Provider_ID, COUNT(*) AS Claims
+        FROM claims c
+        JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+        {where}
+        GROUP BY fl.Provider_ID
+        ORDER BY Claims DESC
+        """,
+        params,
+    )
+
+
+def top_receivers_completed(where="", params=(), limit=15):
+    """`where` must be built with alias="c"; only Completed claims are counted."""
+    cond = f"{where} AND c.Status = 'Completed'" if where else " WHERE c.Status = 'Completed'"
+    return query_df(
+        f"""
+        SELECT c.Receiver_ID, r.Name, COUNT(*) AS Completed_Claims
+        FROM claims c
+        JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
+        {cond}
+        GROUP BY c.Receiver_ID
+        ORDER BY Completed_Claims DESC
+        LIMIT ?
+        """,
+        list(params) + [limit],
+    )
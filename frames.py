@@ -0,0 +1,149 @@
+"""Compact in-memory DataFrames for the food waste tables.
+
+Low-cardinality text columns become categoricals and integer IDs and Quantity are
+downcast to the smallest dtype that holds them. LiveFrame keeps a compact frame of
+a tracked table current by merging the rows the change feed (changes.py) reports.
+
+    python frames.py               # per-table memory report, raw vs compact
+"""
+import argparse
+import threading
+
+import pandas as pd
+
+import changes
+import snapshots
+from data_layer import get_connection, query_df
+
+# Columns with few distinct values relative to row count
+CATEGORICAL_COLUMNS = {
+    "providers": ["Type", "City"],
+    "receivers": ["Type", "City"],
+    "food_listings": ["Food_Name", "Provider_Type", "Location", "Food_Type", "Meal_Type"],
+    "claims": ["Status"],
+}
+INTEGER_COLUMNS = {
+    "providers": ["Provider_ID"],
+    "receivers": ["Receiver_ID"],
+    "food_listings": ["Food_ID", "Quantity", "Provider_ID"],
+    "claims": ["Claim_ID", "Food_ID", "Receiver_ID"],
+}
+
+
+def compact(df, table):
+    """Convert `df` (a frame of `table`) to compact dtypes in place and return it."""
+    for col in CATEGORICAL_COLUMNS.get(table, []):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col in INTEGER_COLUMNS.get(table, []):
+        if col in df.columns and df[col].notna().all():
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def compare_memory(tables=None, **kwargs):
+    """Raw vs compact memory per table, loading each table once (kwargs go to load_table)."""
+    rows = []
+    for table in tables or list(snapshots.SNAPSHOT_TYPES):
+        df = snapshots.load_table(table, **kwargs)
+        raw = int(df.memory_usage(deep=True).sum())
+        small = int(compact(df, table).memory_usage(deep=True).sum())
+        rows.append({"table": table, "rows": len(df), "raw_bytes": raw, "compact_bytes": small,
+                     "ratio": round(raw / small, 2) if small else None})
+    return pd.DataFrame(rows)
+
+
+# Rows fetched per IN (...) query when merging changes (under SQLite's variable limit)
+MERGE_BATCH = 900
+DATE_COLUMNS = ["Expiry_Date", "Timestamp"]
+
+
+class LiveFrame:
+    """Compact frame of a change-tracked table (indexed by its key) plus value counts.
+
+    refresh() polls the change feed and merges only the rows inserted, updated or
+    deleted since the last poll, adjusting `counts` by the same delta; after a
+    rebuild (or a pruned log) it reloads in full. Safe to share between sessions.
+    """
+
+    def __init__(self, table, count_columns=(), db_path=None):
+        self.table = table
+        self.key = changes.TRACKED[table]
+        self.count_columns = list(count_columns)
+        self.db_path = db_path
+        self.seq = 0
+        self.frame = None
+        self.counts = {}
+        self.reloads = self.merged_rows = 0
+        self._lock = threading.Lock()
+
+    def _typed(self, df):
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], format="ISO8601", errors="coerce")
+        return compact(df, self.table).set_index(self.key)
+
+    def _count(self, df, sign):
+        for col in self.count_columns:
+            delta = df[col].value_counts() * sign
+            counts = self.counts[col].add(delta, fill_value=0).astype("int64")
+            self.counts[col] = counts[counts != 0].sort_values(ascending=False)
+
+    def _reload(self, conn):
+        self.frame = self._typed(query_df(f"SELECT * FROM {self.table}", conn=conn))
+        self.counts = {col: pd.Series(dtype="int64") for col in self.count_columns}
+        self._count(self.frame, 1)
+        self.reloads += 1
+
+    def _merge(self, conn, upserted, deleted):
+        old = self.frame.index.intersection(upserted + deleted)
+        self._count(self.frame.loc[old], -1)
+        frame = self.frame.drop(old)
+        if upserted:
+            batches = [upserted[i:i + MERGE_BATCH] for i in range(0, len(upserted), MERGE_BATCH)]
+            new = pd.concat([
+                query_df(f"SELECT * FROM {self.table} WHERE {self.key} IN ({', '.join('?' * len(ids))})",
+                         ids, conn=conn)
+                for ids in batches
+            ])
+            new = self._typed(new)
+            self._count(new, 1)
+            # Categories differ between the parts, so re-compact the combined frame
+            frame = compact(pd.concat([frame, new]), self.table).sort_index()
+        self.frame = frame
+        self.merged_rows += len(upserted) + len(deleted)
+
+    def refresh(self):
+        """Bring the frame up to date; returns the number of rows merged (-1 for a full reload)."""
+        with self._lock:
+            conn = get_connection(self.db_path)
+            # One read transaction, so the log and the rows come from the same snapshot
+            conn.execute("BEGIN")
+            try:
+                if self.frame is None:
+                    latest, changed = changes.latest_seq(conn), None
+                else:
+                    latest, changed = changes.changes_since(conn, self.seq)
+                if changed is None:
+                    self._reload(conn)
+                    merged = -1
+                else:
+                    merged = 0
+                    if self.table in changed:
+                        upserted, deleted = changed[self.table]
+                        self._merge(conn, upserted, deleted)
+                        merged = len(upserted) + len(deleted)
+                self.seq = latest
+            finally:
+                conn.execute("COMMIT")
+            return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory report for raw vs compact table frames.")
+    parser.parse_args(argv)
+    print(compare_memory().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
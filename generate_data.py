@@ -0,0 +1,116 @@
+"""Synthetic providers/receivers/food_listings/claims CSVs at N x the shipped data.
+
+Rows are written one at a time, so even 1000x (a million rows per table) runs in
+constant memory apart from the provider -> (city, type) lookup. Column layout and
+value formats match the CSVs in the repo root, so build_db.py loads them unchanged.
+"""
+import argparse
+import csv
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from build_db import csv_files
+
+# Row counts of the shipped CSVs (scale = 1)
+BASE_ROWS = {"providers": 1000, "receivers": 1000, "food_listings": 1000, "claims": 1000}
+
+PROVIDER_TYPES = ["Supermarket", "Grocery Store", "Restaurant", "Catering Service"]
+RECEIVER_TYPES = ["Shelter", "Individual", "NGO", "Charity"]
+FOOD_NAMES = ["Bread", "Soup", "Fruits", "Vegetables", "Dairy", "Rice", "Pasta", "Salad", "Chicken", "Fish"]
+FOOD_TYPES = ["Non-Vegetarian", "Vegan", "Vegetarian"]
+MEAL_TYPES = ["Breakfast", "Dinner", "Lunch", "Snacks"]
+STATUSES = ["Completed", "Cancelled", "Pending"]
+FIRST = ["James", "Mary", "Linda", "David", "Laurie", "Donald", "Maria", "Kevin", "Susan", "Omar"]
+LAST = ["Gomez", "Ramos", "Smith", "Miller", "Butler", "Nguyen", "Patel", "Cochran", "Lee", "Brown"]
+CITY_PREFIX = ["New", "Port", "East", "West", "North", "South", "Lake", ""]
+CITY_ROOT = ["Jessica", "Carl", "James", "Kelly", "Andrea", "Lewis", "Anderson", "Adam", "Allen", "Miller"]
+CITY_SUFFIX = ["burgh", "ville", "view", "ton", "mouth", "stad", "chester", "borough", "side", "haven"]
+
+# Dates span the same window as the shipped data, starting on 3/1/2025
+START = datetime(2025, 3, 1)
+
+
+def city_names(n, rng):
+    """n distinct city names (numbered once the word combinations run out)."""
+    names = [f"{p} {r}{s}".strip() for p in CITY_PREFIX for r in CITY_ROOT for s in CITY_SUFFIX]
+    rng.shuffle(names)
+    return [names[i] if i < len(names) else f"{names[i % len(names)]} {i // len(names)}" for i in range(n)]
+
+
+def us_date(d):
+    return f"{d.month}/{d.day}/{d.year}"
+
+
+def us_timestamp(d):
+    return f"{d.month}/{d.day}/{d.year} {d.hour}:{d.minute:02d}"
+
+
+def phone(rng):
+    return f"+1-{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(0, 9999):04d}"
+
+
+def generate(out_dir, scale=10, seed=42):
+    """Write the four CSVs to `out_dir`; returns {table: path} in build_db.csv_files order."""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = {table: max(1, int(n * scale)) for table, n in BASE_ROWS.items()}
+    # Roughly one city per provider, like the shipped data
+    cities = city_names(max(1, counts["providers"]), rng)
+    paths = {table: out_dir / Path(path).name for table, path in csv_files.items()}
+
+    def writer(table, header):
+        fh = open(paths[table], "w", newline="", encoding="utf-8")
+        w = csv.writer(fh)
+        w.writerow(header)
+        return fh, w
+
+    provider_city, provider_type = [], []
+    fh, w = writer("providers", ["Provider_ID", "Name", "Type", "Address", "City", "Contact"])
+    with fh:
+        for pid in range(1, counts["providers"] + 1):
+            city, ptype = rng.choice(cities), rng.choice(PROVIDER_TYPES)
+            provider_city.append(city)
+            provider_type.append(ptype)
+            address = f"{rng.randint(1, 99999)} {rng.choice(LAST)} Street\n{city}, {rng.randint(10000, 99999)}"
+            w.writerow([pid, f"{rng.choice(LAST)}-{rng.choice(LAST)}", ptype, address, city, phone(rng)])
+
+    fh, w = writer("receivers", ["Receiver_ID", "Name", "Type", "City", "Contact"])
+    with fh:
+        for rid in range(1, counts["receivers"] + 1):
+            w.writerow([rid, f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.choice(RECEIVER_TYPES),
+                        rng.choice(cities), phone(rng)])
+
+    fh, w = writer("food_listings", ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID",
+                                     "Provider_Type", "Location", "Food_Type", "Meal_Type"])
+    with fh:
+        for fid in range(1, counts["food_listings"] + 1):
+            pid = rng.randint(1, counts["providers"])
+            expiry = START + timedelta(days=rng.randint(15, 29))
+            w.writerow([fid, rng.choice(FOOD_NAMES), rng.randint(1, 50), us_date(expiry), pid,
+                        provider_type[pid - 1], provider_city[pid - 1], rng.choice(FOOD_TYPES),
+                        rng.choice(MEAL_TYPES)])
+
+    fh, w = writer("claims", ["Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"])
+    with fh:
+        for cid in range(1, counts["claims"] + 1):
+            ts = START + timedelta(minutes=rng.randint(0, 14 * 24 * 60))
+            w.writerow([cid, rng.randint(1, counts["food_listings"]), rng.randint(1, counts["receivers"]),
+                        rng.choice(STATUSES), us_timestamp(ts)])
+
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic food waste CSVs.")
+    parser.add_argument("--scale", type=float, default=10, help="multiple of the shipped row counts")
+    parser.add_argument("--out", type=Path, default=Path("synthetic_data"), help="output directory")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    paths = generate(args.out, args.scale, args.seed)
+    print(f"Wrote {', '.join(str(p) for p in paths.values())}")
+
+
+if __name__ == "__main__":
+    main()
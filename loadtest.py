@@ -0,0 +1,120 @@
+"""Load test a running api.py instance with a mix of report and table requests.
+
+    python api.py --port 8000 &
+    python loadtest.py --url http://127.0.0.1:8000 --concurrency 16 --requests 5000
+
+Each worker thread keeps one HTTP keep-alive connection. Prints throughput, latency
+percentiles, errors and the share of responses served from the API's cache.
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+
+def get_json(conn, path):
+    conn.request("GET", path)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def request_mix(conn, rng, count):
+    """`count` request paths drawn from the catalog and real filter values."""
+    _, reports = get_json(conn, "/reports")
+    _, providers = get_json(conn, "/providers?" + urlencode({"limit": 1000}))
+    cities = sorted({row["City"] for row in providers["rows"]}) or ["Andersonville"]
+    statuses = ["Completed", "Pending", "Cancelled"]
+
+    def report():
+        q = rng.choice(reports)
+        params = {"city": rng.choice(cities), "status": rng.choice(statuses), "days": rng.randint(1, 7)}
+        return f"/reports/{q['name']}?" + urlencode({k: v for k, v in params.items() if k in q["params"]})
+
+    def table():
+        table, params = rng.choice([
+            ("providers", {"City": rng.choice(cities)}),
+            ("receivers", {"City": rng.choice(cities)}),
+            ("food_listings", {"Location": rng.choice(cities), "order_by": "Expiry_Date"}),
+            ("claims", {"Status": rng.choice(statuses), "order_by": "-Timestamp"}),
+        ])
+        params["offset"] = rng.choice([0, 0, 0, 100])
+        return f"/{table}?" + urlencode(params)
+
+    def lookup():
+        table = rng.choice(["providers", "receivers", "food_listings", "claims"])
+        return f"/{table}/{rng.randint(1, 1000)}"
+
+    kinds = [report] * 4 + [table] * 4 + [lookup] * 2
+    return [rng.choice(kinds)() for _ in range(count)]
+
+
+def run(url, paths, concurrency=8, timeout=30):
+    parts = urlsplit(url)
+    local = threading.local()
+    latencies, statuses, cache_hits = [], {}, [0]
+    lock = threading.Lock()
+
+    def fetch(path):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        started = time.perf_counter()
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+            cache_hits[0] += response.getheader("X-Cache") == "HIT"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, paths))
+    wall = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "seconds": wall,
+        "requests_per_second": len(latencies) / wall if wall else 0.0,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": max(latencies) * 1000,
+        "statuses": statuses,
+        "cache_hit_ratio": cache_hits[0] / len(latencies) if latencies else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the food waste JSON API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of a running api.py")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    parts = urlsplit(args.url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    paths = request_mix(conn, random.Random(args.seed), args.requests)
+    conn.close()
+    results = run(args.url, paths, args.concurrency)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['requests']:,} requests in {results['seconds']:.2f}s "
+          f"({results['requests_per_second']:,.0f} req/s, concurrency {args.concurrency})")
+    print(f"  latency p50 {results['p50_ms']:.1f}ms  p95 {results['p95_ms']:.1f}ms  "
+          f"p99 {results['p99_ms']:.1f}ms  max {results['max_ms']:.1f}ms")
+    print(f"  statuses {results['statuses']}  cache hits {results['cache_hit_ratio']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
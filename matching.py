@@ -0,0 +1,183 @@
+"""Batch matching of unclaimed, soon-to-expire food listings to receivers in the same city.
+
+Listings are taken from a priority queue in expiry order (earliest first, larger
+quantities first on ties), and each goes to the least-loaded receiver in its city,
+held in a per-city min-heap keyed by open claim count. Every listing costs
+O(log n) heap work, with no pairwise listing x receiver comparison. Matches are
+written back to the claims table as Pending claims, which the summary triggers
+pick up. They take Claim_IDs from the range reserved for proposals
+(build_db.PROPOSED_CLAIM_IDS), so CSV loads never overwrite them.
+
+    python matching.py --horizon 3 --dry-run
+"""
+import argparse
+import heapq
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from build_db import DB_PATH, PROPOSED_CLAIM_IDS
+
+# Claims in these states take a listing off the market
+ACTIVE_STATUSES = ("Completed", "Pending")
+PROPOSED_STATUS = "Pending"
+
+DEFAULT_HORIZON_DAYS = 3
+DEFAULT_MAX_PER_RECEIVER = 5
+
+
+def dataset_now(conn):
+    """The latest claim timestamp: the "current time" of the loaded data."""
+    latest = conn.execute("SELECT MAX(Timestamp) FROM claims_all").fetchone()[0]
+    return latest or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def open_listings(conn, as_of, horizon_days=DEFAULT_HORIZON_DAYS):
+    """Unclaimed listings expiring between `as_of` and `horizon_days` after it.
+
+    Archived claims count too: a listing whose claim was archived is still taken.
+    Returns [(Expiry_Date, Quantity, Food_ID, Location)].
+    """
+    marks = ", ".join("?" * len(ACTIVE_STATUSES))
+    return conn.execute(
+        f"""
+        SELECT f.Expiry_Date, f.Quantity, f.Food_ID, f.Location
+        FROM food_listings f
+        WHERE f.Expiry_Date >= date(?) AND f.Expiry_Date <= date(?, ?)
+          AND f.Quantity > 0
+          AND NOT EXISTS (SELECT 1 FROM claims_all c
+                          WHERE c.Food_ID = f.Food_ID AND c.Status IN ({marks}))
+        """,
+        [as_of, as_of, f"+{int(horizon_days)} days", *ACTIVE_STATUSES],
+    ).fetchall()
+
+
+def receiver_loads(conn):
+    """[(City, Receiver_ID, open claims)] for every receiver."""
+    return conn.execute(
+        """
+        SELECT r.City, r.Receiver_ID, COUNT(c.Claim_ID)
+        FROM receivers r
+        LEFT JOIN claims c ON c.Receiver_ID = r.Receiver_ID AND c.Status = ?
+        GROUP BY r.Receiver_ID
+        """,
+        [PROPOSED_STATUS],
+    ).fetchall()
+
+
+def match(listings, receivers, max_per_receiver=DEFAULT_MAX_PER_RECEIVER):
+    """Pair listings with receivers in the same city.
+
+    listings:  [(expiry, quantity, food_id, city)] as from open_listings()
+    receivers: [(city, receiver_id, load)] as from receiver_loads()
+    A receiver is not given more than `max_per_receiver` open claims (None for no cap).
+    Returns [(food_id, receiver_id)] in expiry order.
+    """
+    by_city = defaultdict(list)
+    for city, receiver_id, load in receivers:
+        by_city[city].append((load, receiver_id))
+    for heap in by_city.values():
+        heapq.heapify(heap)
+
+    queue = [(expiry, -quantity, food_id, city) for expiry, quantity, food_id, city in listings]
+    heapq.heapify(queue)
+
+    matches = []
+    while queue:
+        _, _, food_id, city = heapq.heappop(queue)
+        heap = by_city.get(city)
+        if not heap:
+            continue
+        load, receiver_id = heap[0]
+        if max_per_receiver is not None and load >= max_per_receiver:
+            # The least-loaded receiver is full, so the whole city is
+            heap.clear()
+            continue
+        heapq.heapreplace(heap, (load + 1, receiver_id))
+        matches.append((food_id, receiver_id))
+    return matches
+
+
+def write_claims(conn, matches, timestamp):
+    """Insert the matches as new claims with reserved Claim_IDs; returns the number written."""
+    first = conn.execute(
+        "SELECT COALESCE(MAX(Claim_ID) + 1, ?) FROM claims_all WHERE Claim_ID >= ?",
+        (PROPOSED_CLAIM_IDS, PROPOSED_CLAIM_IDS),
+    ).fetchone()[0]
+    conn.executemany(
+        "INSERT INTO claims (Claim_ID, Food_ID, Receiver_ID, Status, Timestamp) VALUES (?, ?, ?, ?, ?)",
+        [(claim_id, food_id, receiver_id, PROPOSED_STATUS, timestamp)
+         for claim_id, (food_id, receiver_id) in enumerate(matches, first)],
+    )
+    return len(matches)
+
+
+def run(db_path=DB_PATH, as_of=None, horizon_days=DEFAULT_HORIZON_DAYS,
+        max_per_receiver=DEFAULT_MAX_PER_RECEIVER, dry_run=False):
+    """Match open listings and (unless dry_run) write the claims in one transaction.
+
+    Returns counts and per-phase timings, including listings matched per second.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    stats = {}
+    try:
+        # IMMEDIATE so no other writer can claim a listing between the read and the insert
+        conn.execute("BEGIN IMMEDIATE")
+        as_of = as_of or dataset_now(conn)
+        t0 = time.perf_counter()
+        listings = open_listings(conn, as_of, horizon_days)
+        receivers = receiver_loads(conn)
+        stats["load_seconds"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        matches = match(listings, receivers, max_per_receiver)
+        stats["match_seconds"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        written = 0 if dry_run else write_claims(conn, matches, as_of)
+        conn.execute("ROLLBACK" if dry_run else "COMMIT")
+        stats["write_seconds"] = time.perf_counter() - t0
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    total = stats["load_seconds"] + stats["match_seconds"] + stats["write_seconds"]
+    stats.update({
+        "as_of": as_of,
+        "listings": len(listings),
+        "receivers": len(receivers),
+        "matched": len(matches),
+        "unmatched": len(listings) - len(matches),
+        "written": written,
+        "total_seconds": total,
+        "listings_per_second": len(listings) / total if total else 0.0,
+    })
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match soon-to-expire listings to receivers.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--as-of", help="match as of this time (default: latest claim timestamp)")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON_DAYS,
+                        help="only listings expiring within this many days")
+    parser.add_argument("--max-per-receiver", type=int, default=DEFAULT_MAX_PER_RECEIVER,
+                        help="cap on open claims per receiver (0 for no cap)")
+    parser.add_argument("--dry-run", action="store_true", help="match but do not write claims")
+    args = parser.parse_args(argv)
+    stats = run(args.db, args.as_of, args.horizon, args.max_per_receiver or None, args.dry_run)
+    print(f"As of {stats['as_of']}: {stats['listings']:,} open listings, {stats['matched']:,} matched, "
+          f"{stats['unmatched']:,} without a receiver in their city")
+    print(f"  load {stats['load_seconds']:.3f}s  match {stats['match_seconds']:.3f}s  "
+          f"write {stats['write_seconds']:.3f}s  ({stats['listings_per_second']:,.0f} listings/s)")
+    print("Dry run, no claims written." if args.dry_run else f"{stats['written']:,} claims written.")
+
+
+if __name__ == "__main__":
+    main()
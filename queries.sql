@@ -1,116 +1,120 @@
+-- Report catalog: each query is named with "-- name:" and titled by the numbered
+-- comment above it. Named parameters (:city, :status, :days) are bound at run time
+-- by run_queries.py. Aggregate reports read the summary tables built by build_db.py.
+-- "-- plan: allow-scan" marks a report whose full scan is inherent, so
+-- run_queries.py --profile --strict does not fail on it.
+
 -- 1. Providers & receivers count per city
-SELECT p.City,
-       COUNT(DISTINCT p.Provider_ID) AS Providers,
-       COALESCE(rc.Receivers, 0) AS Receivers
-FROM providers p
-LEFT JOIN (
-    SELECT City, COUNT(DISTINCT Receiver_ID) AS Receivers
-    FROM receivers
-    GROUP BY City
-) rc ON rc.City = p.City
-GROUP BY p.City;
+-- name: providers_receivers_per_city
+SELECT City, Providers, Receivers
+FROM city_summary
+WHERE Providers > 0
+ORDER BY City;
 
 
 -- 2. Provider type contributing most by quantity
-SELECT fl.Provider_Type, SUM(fl.Quantity) AS Total_Quantity
-FROM food_listings fl
-GROUP BY fl.Provider_Type
+-- name: quantity_by_provider_type
+SELECT Provider_Type, Listed_Quantity AS Total_Quantity
+FROM provider_type_summary
 ORDER BY Total_Quantity DESC;
 
 
 -- 3. Provider contact info for a given city
+-- name: provider_contacts_in_city
 SELECT p.Name, p.Type AS Provider_Type, p.City, p.Contact
 FROM providers p
-WHERE p.City = 'Andersonville';
+WHERE p.City = :city;
 
 
 
--- 4. Receivers who claimed the most (Completed)
-SELECT r.Name, r.Type, COUNT(*) AS Completed_Claims
-FROM claims c
-JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
-WHERE c.Status = 'Completed'
-GROUP BY r.Receiver_ID, r.Name, r.Type
-ORDER BY Completed_Claims DESC;
+-- 4. Receivers who claimed the most (by status)
+-- name: top_receivers_by_status
+SELECT r.Name, r.Type, rs.Claims
+FROM receiver_status_summary rs
+JOIN receivers r ON r.Receiver_ID = rs.Receiver_ID
+WHERE rs.Status = :status AND rs.Claims > 0
+ORDER BY rs.Claims DESC;
 
 
 -- 5. Total quantity available
-SELECT COALESCE(SUM(Quantity), 0) AS Total_Quantity
-FROM food_listings;
+-- name: total_quantity_available
+SELECT COALESCE(SUM(Listed_Quantity), 0) AS Total_Quantity
+FROM provider_summary;
 
 -- 6. City with highest number of listings
-SELECT p.City, COUNT(*) AS Listings
-FROM food_listings fl
-JOIN providers p ON p.Provider_ID = fl.Provider_ID
-GROUP BY p.City
+-- name: listings_per_city
+SELECT City, Listings
+FROM city_summary
+WHERE Listings > 0
 ORDER BY Listings DESC;
 
 -- 7. Most common food types
-SELECT Food_Type, COUNT(*) AS Frequency
-FROM food_listings
-GROUP BY Food_Type
+-- name: food_type_frequency
+SELECT Food_Type, Listings AS Frequency
+FROM food_type_summary
 ORDER BY Frequency DESC;
 
 -- 8. Claims per food item
+-- name: claims_per_food_item
+-- plan: allow-scan
 SELECT fl.Food_ID, fl.Food_Name, COUNT(c.Claim_ID) AS Claims_Count
 FROM food_listings fl
 LEFT JOIN claims c ON c.Food_ID = fl.Food_ID
 GROUP BY fl.Food_ID, fl.Food_Name
 ORDER BY Claims_Count DESC;
 
--- 9. Provider with most successful (Completed) claims
-SELECT p.Name, COUNT(*) AS Completed_Claims
-FROM claims c
-JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-JOIN providers p ON p.Provider_ID = fl.Provider_ID
-WHERE c.Status = 'Completed'
-GROUP BY p.Provider_ID
-ORDER BY Completed_Claims DESC;
+-- 9. Provider with most claims (by status)
+-- name: top_providers_by_status
+SELECT p.Name, ps.Claims
+FROM provider_status_summary ps
+JOIN providers p ON p.Provider_ID = ps.Provider_ID
+WHERE ps.Status = :status AND ps.Claims > 0
+ORDER BY ps.Claims DESC;
 
 -- 10. Claims status percentages
+-- name: claim_status_percentages
 SELECT Status,
-       ROUND(100.0 * COUNT(*) / (SELECT COUNT(*) FROM claims), 2) AS Percentage
-FROM claims
-GROUP BY Status;
-
--- 11. Average quantity claimed per receiver (completed)
-SELECT r.Name, ROUND(AVG(fl.Quantity), 2) AS Avg_Quantity_Claimed
-FROM claims c
-JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
-JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-WHERE c.Status = 'Completed'
-GROUP BY r.Receiver_ID
+       ROUND(100.0 * Claims / (SELECT SUM(Claims) FROM status_summary), 2) AS Percentage
+FROM status_summary
+WHERE Claims > 0;
+
+-- 11. Average quantity claimed per receiver (by status)
+-- name: avg_quantity_per_receiver
+SELECT r.Name, ROUND(1.0 * rs.Claimed_Quantity / rs.Claims, 2) AS Avg_Quantity_Claimed
+FROM receiver_status_summary rs
+JOIN receivers r ON r.Receiver_ID = rs.Receiver_ID
+WHERE rs.Status = :status AND rs.Claims > 0
 ORDER BY Avg_Quantity_Claimed DESC;
 
 
--- 12. Meal type most claimed
-SELECT fl.Meal_Type, COUNT(*) AS Completed_Claims
-FROM claims c
-JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-WHERE c.Status = 'Completed'
-GROUP BY fl.Meal_Type
-ORDER BY Completed_Claims DESC;
+-- 12. Meal type most claimed (by status)
+-- name: meal_types_by_status
+SELECT Meal_Type, Claims
+FROM meal_type_status_summary
+WHERE Status = :status AND Claims > 0
+ORDER BY Claims DESC;
 
 -- 13. Total quantity donated by each provider
-SELECT p.Name, SUM(fl.Quantity) AS Total_Quantity_Listed
-FROM food_listings fl
-JOIN providers p ON p.Provider_ID = fl.Provider_ID
-GROUP BY p.Provider_ID
+-- name: quantity_by_provider
+-- CROSS JOIN keeps the summary as the outer loop, so providers is read by key
+SELECT p.Name, ps.Listed_Quantity AS Total_Quantity_Listed
+FROM provider_summary ps
+CROSS JOIN providers p ON p.Provider_ID = ps.Provider_ID
+WHERE ps.Listings > 0
 ORDER BY Total_Quantity_Listed DESC;
 
--- 14. Listings expiring within next 3 days
+-- 14. Listings expiring within the next N days
+-- name: listings_expiring_soon
 SELECT fl.Food_ID, fl.Food_Name, fl.Quantity, p.City, fl.Expiry_Date
 FROM food_listings fl
 JOIN providers p ON p.Provider_ID = fl.Provider_ID
-WHERE date(fl.Expiry_Date) <= date('now', '+3 day')
+WHERE fl.Expiry_Date <= date('now', '+' || :days || ' day')
 ORDER BY fl.Expiry_Date;
 
 
--- 15. Top cities by completed claims
-SELECT p.City, COUNT(*) AS Completed_Claims
-FROM claims c
-JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-JOIN providers p ON p.Provider_ID = fl.Provider_ID
-WHERE c.Status = 'Completed'
-GROUP BY p.City
-ORDER BY Completed_Claims DESC;
+-- 15. Top cities by claims (by status)
+-- name: top_cities_by_status
+SELECT City, Claims
+FROM city_status_summary
+WHERE Status = :status AND Claims > 0
+ORDER BY Claims DESC;
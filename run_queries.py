@@ -1,148 +1,384 @@
-import sqlite3
+import argparse
+import csv
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 from tabulate import tabulate
 
-# Connect to database
-conn = sqlite3.connect("food_waste.db")
-cursor = conn.cursor()
-
-# Queries with titles
-queries = [
-    ("Providers & receivers count per city", """
-        SELECT p.City,
-               COUNT(DISTINCT p.Provider_ID) AS Providers,
-               COALESCE(rc.Receivers, 0) AS Receivers
-        FROM providers p
-        LEFT JOIN (
-            SELECT City, COUNT(DISTINCT Receiver_ID) AS Receivers
-            FROM receivers
-            GROUP BY City
-        ) rc ON rc.City = p.City
-        GROUP BY p.City;
-    """),
-
-    ("Provider type contributing most by quantity", """
-        SELECT fl.Provider_Type, SUM(fl.Quantity) AS Total_Quantity
-        FROM food_listings fl
-        GROUP BY fl.Provider_Type
-        ORDER BY Total_Quantity DESC;
-    """),
-
-    ("Provider contact info for a city", """
-    SELECT p.Name, fl.Provider_Type, p.City, p.Contact
-    FROM providers p
-    LEFT JOIN food_listings fl ON p.Provider_ID = fl.Provider_ID
-    WHERE p.City = 'Hyderabad'
-    GROUP BY p.Provider_ID;
-"""),
-
-
-    ("Receivers who claimed the most (Completed)", """
-    SELECT r.Name, r.Type, COUNT(*) AS Completed_Claims
-    FROM claims c
-    JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
-    WHERE c.Status = 'Completed'
-    GROUP BY r.Receiver_ID, r.Name, r.Type
-    ORDER BY Completed_Claims DESC;
-"""),
-
-
-    ("Total quantity available", """
-        SELECT COALESCE(SUM(Quantity), 0) AS Total_Quantity
-        FROM food_listings;
-    """),
-
-    ("City with highest number of listings", """
-        SELECT p.City, COUNT(*) AS Listings
-        FROM food_listings fl
-        JOIN providers p ON p.Provider_ID = fl.Provider_ID
-        GROUP BY p.City
-        ORDER BY Listings DESC;
-    """),
-
-    ("Most common food types", """
-        SELECT Food_Type, COUNT(*) AS Frequency
-        FROM food_listings
-        GROUP BY Food_Type
-        ORDER BY Frequency DESC;
-    """),
-
-    ("Claims per food item", """
-        SELECT fl.Food_ID, fl.Food_Name, COUNT(c.Claim_ID) AS Claims_Count
-        FROM food_listings fl
-        LEFT JOIN claims c ON c.Food_ID = fl.Food_ID
-        GROUP BY fl.Food_ID, fl.Food_Name
-        ORDER BY Claims_Count DESC;
-    """),
-
-    ("Provider with most successful claims", """
-        SELECT p.Name, COUNT(*) AS Completed_Claims
-        FROM claims c
-        JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-        JOIN providers p ON p.Provider_ID = fl.Provider_ID
-        WHERE c.Status = 'Completed'
-        GROUP BY p.Provider_ID
-        ORDER BY Completed_Claims DESC;
-    """),
-
-    ("Claims status percentages", """
-        SELECT Status,
-               ROUND(100.0 * COUNT(*) / (SELECT COUNT(*) FROM claims), 2) AS Percentage
-        FROM claims
-        GROUP BY Status;
-    """),
-
-    ("Average quantity claimed per receiver", """
-        SELECT r.Name, ROUND(AVG(fl.Quantity), 2) AS Avg_Quantity_Claimed
-        FROM claims c
-        JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
-        JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-        WHERE c.Status = 'Completed'
-        GROUP BY r.Receiver_ID
-        ORDER BY Avg_Quantity_Claimed DESC;
-    """),
-
-    ("Meal type most claimed", """
-        SELECT fl.Meal_Type, COUNT(*) AS Completed_Claims
-        FROM claims c
-        JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-        WHERE c.Status = 'Completed'
-        GROUP BY fl.Meal_Type
-        ORDER BY Completed_Claims DESC;
-    """),
-
-    ("Total quantity donated by each provider", """
-        SELECT p.Name, SUM(fl.Quantity) AS Total_Quantity_Listed
-        FROM food_listings fl
-        JOIN providers p ON p.Provider_ID = fl.Provider_ID
-        GROUP BY p.Provider_ID
-        ORDER BY Total_Quantity_Listed DESC;
-    """),
-
-    ("Listings expiring within next 3 days", """
-        SELECT fl.Food_ID, fl.Food_Name, fl.Quantity, p.City, fl.Expiry_Date
-        FROM food_listings fl
-        JOIN providers p ON p.Provider_ID = fl.Provider_ID
-        WHERE DATE(fl.Expiry_Date) <= DATE('now', '+3 day')
-        ORDER BY fl.Expiry_Date;
-    """),
-
-    ("Top cities by completed claims", """
-        SELECT p.City, COUNT(*) AS Completed_Claims
-        FROM claims c
-        JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-        JOIN providers p ON p.Provider_ID = fl.Provider_ID
-        WHERE c.Status = 'Completed'
-        GROUP BY p.City
-        ORDER BY Completed_Claims DESC;
-    """)
-]
-
-# Run and print results with table format
-for title, query in queries:
-    print("\n=== " + title + " ===")
-    cursor.execute(query)
+import archive
+import summaries
+from data_layer import DB_PATH, connect_readonly, database_version, get_connection
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".report_cache"
+FORMATS = ["grid", "json", "csv", "parquet"]
+
+QUERIES_PATH = BASE_DIR / "queries.sql"
+
+# Values bound to the catalog's named parameters unless overridden on the command line
+DEFAULT_PARAMS = {"city": "Andersonville", "status": "Completed", "days": 3}
+
+
+# =========================
+# Query catalog
+# =========================
+_TITLE = re.compile(r"^--\s*\d+\.\s*(.+?)\s*$")
+_NAME = re.compile(r"^--\s*name:\s*(\w+)\s*$")
+_ALLOW_SCAN = re.compile(r"^--\s*plan:\s*allow-scan\s*$")
+_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+# Results that depend on the clock as well as the data ('now', CURRENT_DATE, ...)
+_CLOCK = re.compile(r"'now'|\bCURRENT_(?:DATE|TIME|TIMESTAMP)\b", re.IGNORECASE)
+
+
+def load_catalog(path=QUERIES_PATH):
+    """Parse queries.sql into [{name, title, sql, params}] in file order.
+
+    Each query starts at a "-- name: <name>" line; the "-- N. Title" comment above it
+    is its title. params are the named placeholders (:city, ...) the SQL uses, and
+    volatile marks queries that read the clock, whose results are never cached, and
+    allow_scan those annotated "-- plan: allow-scan" (flags reported, not failed on).
+    """
+    catalog, title, current = [], None, None
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if _TITLE.match(line):
+            title = _TITLE.match(line).group(1)
+        elif _NAME.match(line):
+            name = _NAME.match(line).group(1)
+            current = {"name": name, "title": title or name, "lines": [], "allow_scan": False}
+            catalog.append(current)
+            title = None
+        elif current is not None and _ALLOW_SCAN.match(line):
+            current["allow_scan"] = True
+        elif current is not None and not line.lstrip().startswith("--"):
+            current["lines"].append(line)
+    for q in catalog:
+        q["sql"] = "\n".join(q.pop("lines")).strip().rstrip(";").strip()
+        q["params"] = sorted(set(_PARAM.findall(q["sql"])))
+        q["volatile"] = bool(_CLOCK.search(q["sql"]))
+    return catalog
+
+
+queries = load_catalog()
+
+
+def find_reports(names, catalog=None):
+    catalog = catalog or queries
+    by_name = {q["name"]: q for q in catalog}
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        raise KeyError(f"unknown report(s): {', '.join(unknown)}; see --list")
+    return [by_name[n] for n in names]
+
+
+def bindings(report, params):
+    """Every combination of values for the parameters this report uses.
+
+    `params` maps parameter name -> value or list of values (e.g. hundreds of cities);
+    reports that do not use a parameter are not repeated for it.
+    """
+    combos = [{}]
+    for name in report["params"]:
+        values = params.get(name, DEFAULT_PARAMS.get(name))
+        if values is None:
+            raise KeyError(f"report {report['name']!r} needs a value for :{name}")
+        values = values if isinstance(values, (list, tuple)) else [values]
+        combos = [dict(c, **{name: v}) for c in combos for v in values]
+    return combos
+
+
+# =========================
+# Report engine
+# =========================
+def slugify(title):
+    return re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")
+
+
+def scoped(report, scope="all"):
+    """The report reading hot rows only, or hot and archived rows ("all").
+
+    Summary-backed reports read the summaries alone or their <summary>_all views.
+    """
+    return dict(report, sql=archive.scoped_sql(report["sql"], scope))
+
+
+def version_tag(version):
+    return hashlib.sha256(str(version).encode()).hexdigest()[:16]
+
+
+def cache_key(query, bound, version):
+    """<version tag>_<hash>: entries of superseded versions are found by prefix."""
+    digest = hashlib.sha256(f"{version}\0{query}\0{json.dumps(bound, sort_keys=True)}".encode()).hexdigest()
+    return f"{version_tag(version)}_{digest}"
+
+
+def prune_cache(version, cache_dir=CACHE_DIR):
+    """Delete cached results of other database versions; returns the number removed."""
+    keep = f"{version_tag(version)}_"
+    removed = 0
+    for path in Path(cache_dir).glob("*.json"):
+        if not path.name.startswith(keep):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def run_report(report, bound=None, db_path=DB_PATH, version=None, cache_dir=CACHE_DIR):
+    """Run one report with bound parameters on this thread's read-only connection.
+
+    The SQL text is identical for every binding, so sqlite3's per-connection statement
+    cache prepares it once per thread and re-executes it for each parameter set.
+    Results are cached on disk keyed on query text, parameters and database version,
+    except for volatile reports, which depend on the current time as well.
+    """
+    bound = bound or {}
+    started = time.perf_counter()
+    result = dict(name=report["name"], title=report["title"], params=bound)
+    path = None
+    if cache_dir is not None and version is not None and not report.get("volatile"):
+        path = Path(cache_dir) / f"{cache_key(report['sql'], bound, version)}.json"
+        if path.exists():
+            cached = json.loads(path.read_text())
+            return dict(result, columns=cached["columns"], rows=[tuple(r) for r in cached["rows"]],
+                        seconds=time.perf_counter() - started, cached=True)
+
+    cursor = get_connection(db_path).execute(report["sql"], bound)
     rows = cursor.fetchall()
-    headers = [desc[0] for desc in cursor.description]  # column names
-    print(tabulate(rows, headers=headers, tablefmt="grid"))
+    columns = [desc[0] for desc in cursor.description]  # column names
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"columns": columns, "rows": rows}))
+        tmp.replace(path)
+    return dict(result, columns=columns, rows=rows, seconds=time.perf_counter() - started, cached=False)
+
+
+def run_reports(reports=None, params=None, db_path=DB_PATH, workers=4, use_cache=True, cache_dir=CACHE_DIR,
+                scope="all"):
+    """Run reports (and every parameter binding of each) concurrently, in catalog order."""
+    reports = [scoped(report, scope) for report in reports or queries]
+    params = params or {}
+    version = database_version(db_path) if use_cache else None
+    cache_dir = cache_dir if use_cache else None
+    if cache_dir is not None:
+        prune_cache(version, cache_dir)
+    jobs = [(report, bound) for report in reports for bound in bindings(report, params)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run_report, report, bound, db_path, version, cache_dir)
+                   for report, bound in jobs]
+        return [f.result() for f in futures]
+
+
+# =========================
+# Profiling
+# =========================
+# VM instructions between progress-handler callbacks; step counts are multiples of this
+PROGRESS_EVERY = 100
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|GROUP\b|ORDER\b)(\w+))?",
+                        re.IGNORECASE)
+
+
+def table_aliases(sql):
+    """{alias or table name: table name} for the FROM/JOIN clauses of a query."""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def plan_flags(plan, sql):
+    """Flag full scans of base tables and temp B-trees in an EXPLAIN QUERY PLAN.
+
+    Summary tables are O(groups) by design, so scanning or sorting them is not flagged;
+    a temp B-tree is flagged when the query reads base-table rows other than by key.
+    """
+    aliases = table_aliases(sql)
+    flags, reads_base_rows = [], False
+    for detail in plan:
+        access = re.match(r"(SCAN|SEARCH) (\w+)", detail)
+        if not access:
+            continue
+        table = aliases.get(access.group(2), access.group(2))
+        # Summaries, their archived parts and the <summary>_all views over both
+        if re.sub(r"_(?:all|archived)$", "", table) in summaries.SUMMARY_SCHEMA:
+            continue
+        if access.group(1) == "SCAN":
+            flags.append(f"full scan: {table}" + (" (index)" if "INDEX" in detail else ""))
+        if "PRIMARY KEY" not in detail:
+            reads_base_rows = True
+    if reads_base_rows:
+        flags.extend(d.split("USE ", 1)[-1].lower() for d in plan if "TEMP B-TREE" in d)
+    return flags
+
+
+def profile_report(conn, report, bound):
+    """Plan, wall time, rows and approximate VM steps for one report on `conn`."""
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + report["sql"], bound)]
+    steps = [0]
+
+    def count():
+        steps[0] += PROGRESS_EVERY
+        return 0
+
+    conn.set_progress_handler(count, PROGRESS_EVERY)
+    try:
+        started = time.perf_counter()
+        rows = conn.execute(report["sql"], bound).fetchall()
+        seconds = time.perf_counter() - started
+    finally:
+        conn.set_progress_handler(None, PROGRESS_EVERY)
+    return dict(name=report["name"], title=report["title"], params=bound, rows=len(rows),
+                seconds=seconds, steps=steps[0], plan=plan, flags=plan_flags(plan, report["sql"]),
+                allowed=report.get("allow_scan", False))
+
+
+def run_profile(reports=None, params=None, db_path=DB_PATH, scope="all"):
+    """Profile every report binding sequentially on a dedicated connection."""
+    reports = [scoped(report, scope) for report in reports or queries]
+    params = params or {}
+    conn = connect_readonly(db_path)
+    try:
+        return [profile_report(conn, report, bound)
+                for report in reports for bound in bindings(report, params)]
+    finally:
+        conn.close()
+
+
+def write_profile(results, out=sys.stdout):
+    rows = [(label(r), r["rows"], f"{r['seconds'] * 1000:.2f}", f"{r['steps']:,}",
+             ("(allowed) " if r["allowed"] and r["flags"] else "") + "; ".join(r["flags"]))
+            for r in results]
+    print(tabulate(rows, headers=["Report", "Rows", "ms", "VM steps", "Flags"], tablefmt="simple"), file=out)
+    for r in results:
+        if r["flags"]:
+            print(f"\n-- {label(r)}", file=out)
+            for detail in r["plan"]:
+                print(f"   {detail}", file=out)
+    flagged = sum(1 for r in results if r["flags"] and not r["allowed"])
+    allowed = sum(1 for r in results if r["flags"] and r["allowed"])
+    print(f"\n{flagged} of {len(results)} reports flagged ({allowed} allowed)", file=out)
+
+
+# =========================
+# Output
+# =========================
+def label(r):
+    bound = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+    return f"{r['title']} ({bound})" if bound else r["title"]
+
+
+def write_grid(results, out):
+    for r in results:
+        print("\n=== " + label(r) + " ===", file=out)
+        print(tabulate(r["rows"], headers=r["columns"], tablefmt="grid"), file=out)
+
+
+def write_json(results, out):
+    payload = [{"name": r["name"], "title": r["title"], "params": r["params"], "columns": r["columns"],
+                "rows": [dict(zip(r["columns"], row)) for row in r["rows"]]} for r in results]
+    json.dump(payload, out, indent=2)
+    out.write("\n")
+
+
+def write_csv_files(results, out_dir):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for r in results:
+        with open(out_dir / f"{slugify(label(r))}.csv", "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(r["columns"])
+            writer.writerows(r["rows"])
+
+
+def write_parquet_files(results, out_dir):
+    import pandas as pd  # Parquet also needs pyarrow (or fastparquet) installed
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for r in results:
+        pd.DataFrame(r["rows"], columns=r["columns"]).to_parquet(out_dir / f"{slugify(label(r))}.parquet",
+                                                                  index=False)
+
+
+def print_timings(results, wall, out=sys.stderr):
+    rows = [(label(r), len(r["rows"]), f"{r['seconds'] * 1000:.1f}", "yes" if r["cached"] else "")
+            for r in results]
+    print(tabulate(rows, headers=["Report", "Rows", "ms", "Cached"], tablefmt="simple"), file=out)
+    print(f"{len(results)} reports in {wall * 1000:.1f} ms wall", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the food waste reports.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--format", choices=FORMATS, default="grid")
+    parser.add_argument("--output", type=Path,
+                        help="output file (grid/json) or directory (csv/parquet); default stdout / ./reports")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent read-only connections")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not write the result cache")
+    parser.add_argument("--timings", action="store_true", help="print a per-report timing summary to stderr")
+    parser.add_argument("--list", action="store_true", help="list the report catalog and exit")
+    parser.add_argument("--report", action="append", metavar="NAME",
+                        help="run only this catalog report (repeatable)")
+    parser.add_argument("--city", action="append", help="value for :city (repeatable)")
+    parser.add_argument("--all-cities", action="store_true", help="bind :city to every provider city")
+    parser.add_argument("--status", action="append", help="value for :status (repeatable)")
+    parser.add_argument("--days", action="append", type=int, help="value for :days (repeatable)")
+    parser.add_argument("--scope", choices=archive.SCOPES, default="all",
+                        help="read hot rows only, or hot and archived rows (default)")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile the reports (query plan, time, VM steps) instead of printing results")
+    parser.add_argument("--profile-out", type=Path, help="also write the profile as JSON")
+    parser.add_argument("--strict", action="store_true",
+                        help="with --profile, exit non-zero if a report not marked allow-scan is flagged")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for q in queries:
+            params = ", ".join(f":{p}" for p in q["params"])
+            print(f"{q['name']:<32} {q['title']}{'  [' + params + ']' if params else ''}")
+        return
+
+    reports = find_reports(args.report) if args.report else queries
+    params = {name: values for name, values in
+              (("city", args.city), ("status", args.status), ("days", args.days)) if values}
+    if args.all_cities:
+        params["city"] = [r[0] for r in get_connection(args.db).execute(
+            "SELECT DISTINCT City FROM providers WHERE City IS NOT NULL ORDER BY City")]
+
+    if args.profile:
+        profile = run_profile(reports, params, db_path=args.db, scope=args.scope)
+        write_profile(profile)
+        if args.profile_out:
+            args.profile_out.write_text(json.dumps(profile, indent=2))
+        if args.strict and any(r["flags"] and not r["allowed"] for r in profile):
+            sys.exit(1)
+        return
+
+    started = time.perf_counter()
+    results = run_reports(reports, params, db_path=args.db, workers=args.workers, use_cache=not args.no_cache,
+                          scope=args.scope)
+    wall = time.perf_counter() - started
+
+    if args.format in ("csv", "parquet"):
+        out_dir = args.output or BASE_DIR / "reports"
+        (write_csv_files if args.format == "csv" else write_parquet_files)(results, out_dir)
+        print(f"Wrote {len(results)} {args.format} files to {out_dir}", file=sys.stderr)
+    else:
+        writer = write_grid if args.format == "grid" else write_json
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as out:
+                writer(results, out)
+        else:
+            writer(results, sys.stdout)
+
+    if args.timings:
+        print_timings(results, wall)
+
 
-conn.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Indexed full-text search over provider, receiver and food listing names.
+
+build_db.py maintains one external-content FTS5 table per base table, using the
+trigram tokenizer so "contains" searches (the dashboard's existing semantics) are
+answered from the index instead of scanning every row. Queries shorter than three
+characters cannot use trigrams and fall back to LIKE.
+
+    python search.py providers smith --limit 10
+"""
+import argparse
+
+# FTS table per base table: (primary key, indexed columns)
+FTS_TABLES = {
+    "providers": ("Provider_ID", ["Name", "Address", "City"]),
+    "receivers": ("Receiver_ID", ["Name", "City"]),
+    "food_listings": ("Food_ID", ["Food_Name", "Location"]),
+}
+MIN_TRIGRAM = 3
+
+
+def fts_name(table):
+    return f"{table}_fts"
+
+
+def fts_schema(table):
+    key, cols = FTS_TABLES[table]
+    return (f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name(table)} USING fts5("
+            f"{', '.join(cols)}, content='{table}', content_rowid='{key}', tokenize='trigram')")
+
+
+def trigger_sql(table):
+    """Keep the external-content index in step with inserts, updates and deletes."""
+    key, cols = FTS_TABLES[table]
+    fts = fts_name(table)
+    col_list = ", ".join(cols)
+    new_vals = ", ".join(f"new.{c}" for c in cols)
+    old_vals = ", ".join(f"old.{c}" for c in cols)
+    insert = f"INSERT INTO {fts} (rowid, {col_list}) VALUES (new.{key}, {new_vals});"
+    delete = f"INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.{key}, {old_vals});"
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in cols)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_ins AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_del AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_upd AFTER UPDATE ON {table} "
+        f"WHEN {changed} BEGIN {delete} {insert} END",
+    ]
+
+
+def fts_exists(conn, table):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_name(table),)
+    ).fetchone() is not None
+
+
+def drop_triggers(conn):
+    for table in FTS_TABLES:
+        for op in ("ins", "del", "upd"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_fts_{op}")
+
+
+def rebuild_indexes(conn):
+    """(Re)build every FTS index from its base table and install the sync triggers."""
+    for table in FTS_TABLES:
+        conn.execute(fts_schema(table))
+        fts = fts_name(table)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        for ddl in trigger_sql(table):
+            conn.execute(ddl)
+
+
+def _fts_query(text, column=None):
+    phrase = '"' + text.replace('"', '""') + '"'
+    return f"{{{column}}} : {phrase}" if column else phrase
+
+
+def escape_like(text):
+    """Escape LIKE wildcards for use with ESCAPE '\\'."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def match_clause(table, column, text, alias=None):
+    """WHERE fragment restricting `table` to rows whose `column` contains `text`.
+
+    Returns (sql, params). Uses the FTS index for text of three or more characters;
+    the text is matched as given, surrounding spaces included.
+    """
+    key, _ = FTS_TABLES[table]
+    prefix = f"{alias}." if alias else ""
+    if len(text) < MIN_TRIGRAM:
+        return f"{prefix}{column} LIKE ? ESCAPE '\\'", [f"%{escape_like(text)}%"]
+    fts = fts_name(table)
+    return (f"{prefix}{key} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)",
+            [_fts_query(text, column)])
+
+
+def search(conn, table, text, column=None, limit=20, prefix=False):
+    """Ranked matches for `text` in `table` (all indexed columns unless `column`).
+
+    Rows whose column starts with the text rank first, then by bm25. With
+    prefix=True only those starting with the text are returned. Returns
+    (column names, rows) with a Score column (lower is better).
+    """
+    key, cols = FTS_TABLES[table]
+    text = text.strip()
+    if not text:
+        return [], []
+    like_start = f"{escape_like(text)}%"
+    starts = f"t.{column or cols[0]} LIKE ? ESCAPE '\\'"
+    if len(text) < MIN_TRIGRAM:
+        targets = [column] if column else cols
+        where = " OR ".join(f"t.{c} LIKE ? ESCAPE '\\'" for c in targets)
+        sql = f"SELECT t.*, 0.0 AS Score FROM {table} t WHERE ({where})"
+        params = [f"%{escape_like(text)}%"] * len(targets)
+        rank = f"t.{key}"
+    else:
+        fts = fts_name(table)
+        sql = (f"SELECT t.*, f.rank AS Score FROM {fts} f JOIN {table} t ON t.{key} = f.rowid "
+               f"WHERE {fts} MATCH ?")
+        params = [_fts_query(text, column)]
+        rank = "f.rank"
+    if prefix:
+        sql += f" AND {starts}"
+        params.append(like_start)
+    cursor = conn.execute(f"{sql} ORDER BY {starts} DESC, {rank} LIMIT ?", params + [like_start, limit])
+    return [d[0] for d in cursor.description], cursor.fetchall()
+
+
+def main(argv=None):
+    from tabulate import tabulate
+
+    from data_layer import get_connection
+
+    parser = argparse.ArgumentParser(description="Search provider, receiver and food names.")
+    parser.add_argument("table", choices=list(FTS_TABLES))
+    parser.add_argument("text")
+    parser.add_argument("--column", help="search only this column")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--prefix", action="store_true", help="only values starting with the text")
+    args = parser.parse_args(argv)
+    columns, rows = search(get_connection(), args.table, args.text, args.column, args.limit, args.prefix)
+    print(tabulate(rows, headers=columns, tablefmt="simple"))
+
+
+if __name__ == "__main__":
+    main()
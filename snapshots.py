@@ -0,0 +1,149 @@
+"""Pre-typed columnar snapshots of the database tables for fast frame loading.
+
+Each table is written as an uncompressed Arrow IPC (Feather v2) file, so readers can
+memory-map it and load only the columns they need, already typed: no CSV parsing and
+no to_datetime/to_numeric coercion at load time. A manifest records the database
+version the snapshot was taken from; a stale or missing snapshot falls back to the CSVs.
+
+    python snapshots.py            # or: python build_db.py --snapshot
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from build_db import BASE_DIR, csv_files
+from data_layer import DB_PATH, connect_readonly, database_version
+
+SNAPSHOT_DIR = BASE_DIR / "snapshots"
+MANIFEST = "manifest.json"
+
+# Rows fetched from SQLite per Arrow record batch
+BATCH_ROWS = 100_000
+
+# Arrow type per column (names from pyarrow); dates are ISO text in SQLite
+SNAPSHOT_TYPES = {
+    "providers": {"Provider_ID": "int64", "Name": "string", "Type": "string", "Address": "string",
+                  "City": "string", "Contact": "string"},
+    "receivers": {"Receiver_ID": "int64", "Name": "string", "Type": "string", "City": "string",
+                  "Contact": "string"},
+    "food_listings": {"Food_ID": "int64", "Food_Name": "string", "Quantity": "int64",
+                      "Expiry_Date": "timestamp", "Provider_ID": "int64", "Provider_Type": "string",
+                      "Location": "string", "Food_Type": "string", "Meal_Type": "string"},
+    "claims": {"Claim_ID": "int64", "Food_ID": "int64", "Receiver_ID": "int64", "Status": "string",
+               "Timestamp": "timestamp"},
+}
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:  # snapshots are optional; loaders fall back to the CSVs
+        return None, None
+    return pa, feather
+
+
+def _arrow_type(pa, name):
+    return pa.timestamp("s") if name == "timestamp" else getattr(pa, name)()
+
+
+def write_snapshots(db_path=DB_PATH, out_dir=SNAPSHOT_DIR, tables=None):
+    """Write one .arrow file per table plus a manifest; returns {table: rows}."""
+    pa, feather = _arrow()
+    if pa is None:
+        raise RuntimeError("pyarrow is required to write snapshots (pip install pyarrow)")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tables = tables or list(SNAPSHOT_TYPES)
+    conn = connect_readonly(db_path)
+    counts = {}
+    try:
+        for table in tables:
+            types = SNAPSHOT_TYPES[table]
+            schema = pa.schema([(col, _arrow_type(pa, t)) for col, t in types.items()])
+            cursor = conn.execute(f"SELECT {', '.join(types)} FROM {table}")
+            tmp = out_dir / f"{table}.arrow.tmp"
+            rows = 0
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                while True:
+                    chunk = cursor.fetchmany(BATCH_ROWS)
+                    if not chunk:
+                        break
+                    columns = list(zip(*chunk))
+                    arrays = []
+                    for values, (col, t) in zip(columns, types.items()):
+                        if t == "timestamp":
+                            arrays.append(pa.array(values, pa.string()).cast(pa.timestamp("s")))
+                        else:
+                            arrays.append(pa.array(values, _arrow_type(pa, t)))
+                    writer.write_batch(pa.record_batch(arrays, schema=schema))
+                    rows += len(chunk)
+            os.replace(tmp, out_dir / f"{table}.arrow")
+            counts[table] = rows
+    finally:
+        conn.close()
+
+    manifest = {
+        "database_version": database_version(db_path),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tables": counts,
+    }
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return counts
+
+
+def snapshot_fresh(snapshot_dir=SNAPSHOT_DIR, db_path=DB_PATH):
+    """True when the snapshot was taken from the database as it is now."""
+    path = Path(snapshot_dir) / MANIFEST
+    if not path.exists() or not Path(db_path).exists():
+        return False
+    return json.loads(path.read_text()).get("database_version") == database_version(db_path)
+
+
+def load_snapshot(table, columns=None, snapshot_dir=SNAPSHOT_DIR, db_path=DB_PATH):
+    """Memory-mapped, typed DataFrame from a fresh snapshot, or None if there is none."""
+    pa, feather = _arrow()
+    path = Path(snapshot_dir) / f"{table}.arrow"
+    if pa is None or not path.exists() or not snapshot_fresh(snapshot_dir, db_path):
+        return None
+    return feather.read_table(str(path), columns=columns, memory_map=True).to_pandas()
+
+
+def load_csv(table, columns=None, path=None):
+    """The same frame parsed from the source CSV (the pre-snapshot load path)."""
+    df = pd.read_csv(path or csv_files[table], usecols=columns)
+    # Normalize/parse dates that exist
+    if "Expiry_Date" in df.columns:
+        df["Expiry_Date"] = pd.to_datetime(df["Expiry_Date"], format="%m/%d/%Y", errors="coerce")
+    if "Timestamp" in df.columns:
+        df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%m/%d/%Y %H:%M", errors="coerce")
+    # Coerce numerics where helpful
+    if "Quantity" in df.columns:
+        df["Quantity"] = pd.to_numeric(df["Quantity"], errors="coerce")
+    return df
+
+
+def load_table(table, columns=None, snapshot_dir=SNAPSHOT_DIR, db_path=DB_PATH):
+    """DataFrame for one table: the snapshot when fresh, otherwise the CSV."""
+    df = load_snapshot(table, columns, snapshot_dir, db_path)
+    return df if df is not None else load_csv(table, columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write columnar snapshots of food_waste.db.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--out", type=Path, default=SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    counts = write_snapshots(args.db, args.out)
+    print(f"Snapshots written to {args.out} ({sum(counts.values()):,} rows, "
+          f"{time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
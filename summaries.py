@@ -0,0 +1,434 @@
+"""Materialized aggregate tables for the dashboard charts and run_queries.py reports.
+
+The summaries are rebuilt with one GROUP BY pass after a full load and then kept
+current by triggers on the base tables, so incremental loads only touch the groups
+their rows belong to. Readers get O(groups) lookups instead of O(rows) scans.
+
+The claim_time_buckets and expiry_buckets tables hold hourly/daily/weekly counts by
+Status, City and Food_Type, so time charts fetch one row per bucket, not per claim.
+
+Triggers handle rows being inserted, deleted or updated in place. The one thing
+they cannot follow cheaply is a parent attribute changing under existing claims
+(a provider moving city, a listing changing Provider_ID, Quantity, Meal_Type,
+Location or Food_Type); those updates mark the summaries stale and the next
+ingest does a full refresh.
+
+The summaries cover the working (hot) tables. Rows moved to the archive (archive.py)
+leave them through the delete triggers and add their contributions to a matching
+<summary>_archived table instead; the <summary>_all views add the two up.
+"""
+
+SUMMARY_SCHEMA = {
+    "city_summary": """
+        CREATE TABLE IF NOT EXISTS city_summary (
+            City TEXT PRIMARY KEY,
+            Providers INTEGER NOT NULL DEFAULT 0,
+            Receivers INTEGER NOT NULL DEFAULT 0,
+            Listings INTEGER NOT NULL DEFAULT 0,
+            Listed_Quantity INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    "city_status_summary": """
+        CREATE TABLE IF NOT EXISTS city_status_summary (
+            City TEXT NOT NULL,
+            Status TEXT NOT NULL,
+            Claims INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (City, Status)
+        )
+    """,
+    "provider_summary": """
+        CREATE TABLE IF NOT EXISTS provider_summary (
+            Provider_ID INTEGER PRIMARY KEY,
+            Listings INTEGER NOT NULL DEFAULT 0,
+            Listed_Quantity INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    "provider_status_summary": """
+        CREATE TABLE IF NOT EXISTS provider_status_summary (
+            Provider_ID INTEGER NOT NULL,
+            Status TEXT NOT NULL,
+            Claims INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Provider_ID, Status)
+        )
+    """,
+    "receiver_status_summary": """
+        CREATE TABLE IF NOT EXISTS receiver_status_summary (
+            Receiver_ID INTEGER NOT NULL,
+            Status TEXT NOT NULL,
+            Claims INTEGER NOT NULL DEFAULT 0,
+            Claimed_Quantity INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Receiver_ID, Status)
+        )
+    """,
+    "food_type_summary": """
+        CREATE TABLE IF NOT EXISTS food_type_summary (
+            Food_Type TEXT PRIMARY KEY,
+            Listings INTEGER NOT NULL DEFAULT 0,
+            Listed_Quantity INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    "provider_type_summary": """
+        CREATE TABLE IF NOT EXISTS provider_type_summary (
+            Provider_Type TEXT PRIMARY KEY,
+            Listings INTEGER NOT NULL DEFAULT 0,
+            Listed_Quantity INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    "meal_type_summary": """
+        CREATE TABLE IF NOT EXISTS meal_type_summary (
+            Meal_Type TEXT PRIMARY KEY,
+            Listings INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    "meal_type_status_summary": """
+        CREATE TABLE IF NOT EXISTS meal_type_status_summary (
+            Meal_Type TEXT NOT NULL,
+            Status TEXT NOT NULL,
+            Claims INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Meal_Type, Status)
+        )
+    """,
+    "status_summary": """
+        CREATE TABLE IF NOT EXISTS status_summary (
+            Status TEXT PRIMARY KEY,
+            Claims INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    "claim_time_buckets": """
+        CREATE TABLE IF NOT EXISTS claim_time_buckets (
+            Grain TEXT NOT NULL,
+            Bucket TEXT NOT NULL,
+            Status TEXT NOT NULL,
+            City TEXT NOT NULL,
+            Food_Type TEXT NOT NULL,
+            Claims INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Grain, Bucket, Status, City, Food_Type)
+        )
+    """,
+    "expiry_buckets": """
+        CREATE TABLE IF NOT EXISTS expiry_buckets (
+            Grain TEXT NOT NULL,
+            Bucket TEXT NOT NULL,
+            City TEXT NOT NULL,
+            Food_Type TEXT NOT NULL,
+            Listings INTEGER NOT NULL DEFAULT 0,
+            Listed_Quantity INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Grain, Bucket, City, Food_Type)
+        )
+    """,
+}
+
+# Time-chart buckets: grain -> SQL expression for the bucket start ("{col}" is an ISO
+# date/timestamp). Weeks start on Monday. Expiry dates have no time, so no hourly grain.
+CLAIM_GRAINS = {
+    "hour": "strftime('%Y-%m-%d %H:00', {col})",
+    "day": "date({col})",
+    "week": "date({col}, 'weekday 0', '-6 days')",
+}
+EXPIRY_GRAINS = {grain: CLAIM_GRAINS[grain] for grain in ("day", "week")}
+
+# Per-status reports filter on Status and rank by Claims
+SUMMARY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_city_status_summary ON city_status_summary(Status, Claims)",
+    "CREATE INDEX IF NOT EXISTS idx_provider_status_summary ON provider_status_summary(Status, Claims)",
+    "CREATE INDEX IF NOT EXISTS idx_receiver_status_summary ON receiver_status_summary(Status, Claims)",
+]
+
+SUMMARY_META_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS summary_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+"""
+
+# Full recompute, one GROUP BY per summary table
+SUMMARY_REFRESH = {
+    "city_summary": """
+        INSERT INTO city_summary (City, Providers, Receivers, Listings, Listed_Quantity)
+        SELECT City, SUM(Providers), SUM(Receivers), SUM(Listings), SUM(Listed_Quantity)
+        FROM (
+            SELECT City, COUNT(*) AS Providers, 0 AS Receivers, 0 AS Listings, 0 AS Listed_Quantity
+            FROM providers GROUP BY City
+            UNION ALL
+            SELECT City, 0, COUNT(*), 0, 0 FROM receivers GROUP BY City
+            UNION ALL
+            SELECT p.City, 0, 0, COUNT(*), COALESCE(SUM(fl.Quantity), 0)
+            FROM food_listings fl JOIN providers p ON p.Provider_ID = fl.Provider_ID
+            GROUP BY p.City
+        )
+        WHERE City IS NOT NULL
+        GROUP BY City
+    """,
+    "city_status_summary": """
+        INSERT INTO city_status_summary (City, Status, Claims)
+        SELECT p.City, c.Status, COUNT(*)
+        FROM claims c
+        JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+        JOIN providers p ON p.Provider_ID = fl.Provider_ID
+        WHERE p.City IS NOT NULL
+        GROUP BY p.City, c.Status
+    """,
+    "provider_summary": """
+        INSERT INTO provider_summary (Provider_ID, Listings, Listed_Quantity)
+        SELECT Provider_ID, COUNT(*), COALESCE(SUM(Quantity), 0)
+        FROM food_listings GROUP BY Provider_ID
+    """,
+    "provider_status_summary": """
+        INSERT INTO provider_status_summary (Provider_ID, Status, Claims)
+        SELECT fl.Provider_ID, c.Status, COUNT(*)
+        FROM claims c JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+        GROUP BY fl.Provider_ID, c.Status
+    """,
+    "receiver_status_summary": """
+        INSERT INTO receiver_status_summary (Receiver_ID, Status, Claims, Claimed_Quantity)
+        SELECT c.Receiver_ID, c.Status, COUNT(*), COALESCE(SUM(fl.Quantity), 0)
+        FROM claims c JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+        GROUP BY c.Receiver_ID, c.Status
+    """,
+    "food_type_summary": """
+        INSERT INTO food_type_summary (Food_Type, Listings, Listed_Quantity)
+        SELECT Food_Type, COUNT(*), COALESCE(SUM(Quantity), 0)
+        FROM food_listings WHERE Food_Type IS NOT NULL GROUP BY Food_Type
+    """,
+    "provider_type_summary": """
+        INSERT INTO provider_type_summary (Provider_Type, Listings, Listed_Quantity)
+        SELECT Provider_Type, COUNT(*), COALESCE(SUM(Quantity), 0)
+        FROM food_listings WHERE Provider_Type IS NOT NULL GROUP BY Provider_Type
+    """,
+    "meal_type_summary": """
+        INSERT INTO meal_type_summary (Meal_Type, Listings)
+        SELECT Meal_Type, COUNT(*)
+        FROM food_listings WHERE Meal_Type IS NOT NULL GROUP BY Meal_Type
+    """,
+    "meal_type_status_summary": """
+        INSERT INTO meal_type_status_summary (Meal_Type, Status, Claims)
+        SELECT fl.Meal_Type, c.Status, COUNT(*)
+        FROM claims c JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+        WHERE fl.Meal_Type IS NOT NULL
+        GROUP BY fl.Meal_Type, c.Status
+    """,
+    "status_summary": """
+        INSERT INTO status_summary (Status, Claims)
+        SELECT Status, COUNT(*) FROM claims GROUP BY Status
+    """,
+    "claim_time_buckets": "INSERT INTO claim_time_buckets (Grain, Bucket, Status, City, Food_Type, Claims)"
+                          + " UNION ALL ".join(
+        f"""
+        SELECT '{grain}', {expr.format(col="c.Timestamp")} AS Bucket, c.Status, fl.Location, fl.Food_Type,
+               COUNT(*)
+        FROM claims c JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+        WHERE c.Timestamp IS NOT NULL AND fl.Location IS NOT NULL AND fl.Food_Type IS NOT NULL
+        GROUP BY Bucket, c.Status, fl.Location, fl.Food_Type
+        """ for grain, expr in CLAIM_GRAINS.items()),
+    "expiry_buckets": "INSERT INTO expiry_buckets (Grain, Bucket, City, Food_Type, Listings, Listed_Quantity)"
+                      + " UNION ALL ".join(
+        f"""
+        SELECT '{grain}', {expr.format(col="Expiry_Date")} AS Bucket, Location, Food_Type,
+               COUNT(*), COALESCE(SUM(Quantity), 0)
+        FROM food_listings
+        WHERE Expiry_Date IS NOT NULL AND Location IS NOT NULL AND Food_Type IS NOT NULL
+        GROUP BY Bucket, Location, Food_Type
+        """ for grain, expr in EXPIRY_GRAINS.items()),
+}
+
+# Per-row contributions of each base table: (summary table, {key column: key expression},
+# {column: value expression}). "{r}" is replaced with NEW or OLD inside the triggers.
+_LISTING_QTY = "COALESCE({r}.Quantity, 0)"
+_CLAIM_LISTING = "(SELECT {col} FROM food_listings WHERE Food_ID = {{r}}.Food_ID)"
+CONTRIBUTIONS = {
+    "providers": [
+        ("city_summary", {"City": "{r}.City"}, {"Providers": "1"}),
+    ],
+    "receivers": [
+        ("city_summary", {"City": "{r}.City"}, {"Receivers": "1"}),
+    ],
+    "food_listings": [
+        ("city_summary", {"City": "(SELECT City FROM providers WHERE Provider_ID = {r}.Provider_ID)"},
+         {"Listings": "1", "Listed_Quantity": _LISTING_QTY}),
+        ("provider_summary", {"Provider_ID": "{r}.Provider_ID"},
+         {"Listings": "1", "Listed_Quantity": _LISTING_QTY}),
+        ("food_type_summary", {"Food_Type": "{r}.Food_Type"},
+         {"Listings": "1", "Listed_Quantity": _LISTING_QTY}),
+        ("provider_type_summary", {"Provider_Type": "{r}.Provider_Type"},
+         {"Listings": "1", "Listed_Quantity": _LISTING_QTY}),
+        ("meal_type_summary", {"Meal_Type": "{r}.Meal_Type"}, {"Listings": "1"}),
+    ] + [
+        ("expiry_buckets",
+         {"Grain": f"'{grain}'", "Bucket": expr.format(col="{r}.Expiry_Date"), "City": "{r}.Location",
+          "Food_Type": "{r}.Food_Type"},
+         {"Listings": "1", "Listed_Quantity": _LISTING_QTY})
+        for grain, expr in EXPIRY_GRAINS.items()
+    ],
+    "claims": [
+        ("status_summary", {"Status": "{r}.Status"}, {"Claims": "1"}),
+        ("receiver_status_summary", {"Receiver_ID": "{r}.Receiver_ID", "Status": "{r}.Status"},
+         {"Claims": "1",
+          "Claimed_Quantity": f"COALESCE({_CLAIM_LISTING.format(col='Quantity')}, 0)"}),
+        ("provider_status_summary",
+         {"Provider_ID": _CLAIM_LISTING.format(col="Provider_ID"), "Status": "{r}.Status"},
+         {"Claims": "1"}),
+        ("city_status_summary",
+         {"City": "(SELECT p.City FROM food_listings fl JOIN providers p ON p.Provider_ID = fl.Provider_ID "
+                  "WHERE fl.Food_ID = {r}.Food_ID)",
+          "Status": "{r}.Status"},
+         {"Claims": "1"}),
+        ("meal_type_status_summary",
+         {"Meal_Type": _CLAIM_LISTING.format(col="Meal_Type"), "Status": "{r}.Status"},
+         {"Claims": "1"}),
+    ] + [
+        ("claim_time_buckets",
+         {"Grain": f"'{grain}'", "Bucket": expr.format(col="{r}.Timestamp"), "Status": "{r}.Status",
+          "City": _CLAIM_LISTING.format(col="Location"), "Food_Type": _CLAIM_LISTING.format(col="Food_Type")},
+         {"Claims": "1"})
+        for grain, expr in CLAIM_GRAINS.items()
+    ],
+}
+
+# Parent columns other tables' contributions are derived from (see module docstring)
+DERIVED_FROM = {
+    "providers": ["City"],
+    "food_listings": ["Provider_ID", "Quantity", "Meal_Type", "Location", "Food_Type"],
+}
+
+
+def _apply(summary, keys, values, row, sign):
+    key_cols, value_cols = list(keys), list(values)
+    key_exprs = [f"{keys[c].format(r=row)} AS {c}" for c in key_cols]
+    exprs = [f"{sign}({values[c].format(r=row)})" for c in value_cols]
+    not_null = " AND ".join(f"{c} IS NOT NULL" for c in key_cols)
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in value_cols)
+    # SELECT ... WHERE (rather than VALUES) skips NULL keys and disambiguates ON CONFLICT
+    return (f"INSERT INTO {summary} ({', '.join(key_cols + value_cols)}) "
+            f"SELECT {', '.join(key_cols)}, {', '.join(exprs)} "
+            f"FROM (SELECT {', '.join(key_exprs)}) WHERE {not_null} "
+            f"ON CONFLICT({', '.join(key_cols)}) DO UPDATE SET {updates};")
+
+
+def trigger_sql():
+    """CREATE TRIGGER statements keeping the summaries in step with the base tables."""
+    statements = []
+    for table, contributions in CONTRIBUTIONS.items():
+        add = [_apply(s, k, v, "NEW", "+") for s, k, v in contributions]
+        sub = [_apply(s, k, v, "OLD", "-") for s, k, v in contributions]
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_ins AFTER INSERT ON {table} "
+            f"BEGIN {' '.join(add)} END"
+        )
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_del AFTER DELETE ON {table} "
+            f"BEGIN {' '.join(sub)} END"
+        )
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_upd AFTER UPDATE ON {table} "
+            f"BEGIN {' '.join(sub + add)} END"
+        )
+    for table, cols in DERIVED_FROM.items():
+        changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in cols)
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_stale AFTER UPDATE OF {', '.join(cols)} "
+            f"ON {table} WHEN {changed} "
+            # Not INSERT OR REPLACE: under an outer upsert the trigger's conflict clause is ignored
+            f"BEGIN INSERT INTO summary_meta (key, value) VALUES ('stale', 1) "
+            f"ON CONFLICT(key) DO UPDATE SET value = 1; END"
+        )
+    return statements
+
+
+def drop_triggers(conn):
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg\\_%\\_summary\\_%' ESCAPE '\\'"
+    )]
+    for name in names:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def install_triggers(conn):
+    """Replace the triggers, so databases built by an older version get the current bodies."""
+    drop_triggers(conn)
+    for ddl in trigger_sql():
+        conn.execute(ddl)
+
+
+def create_archived_summaries(conn, tables):
+    """<summary>_archived tables fed by inserts into <table>_archive, and <summary>_all views.
+
+    Archived rows are not updated, so unlike the hot summaries these are only ever
+    added to and need no refresh.
+    """
+    for summary, ddl in SUMMARY_SCHEMA.items():
+        conn.execute(ddl.replace(f" {summary} (", f" {summary}_archived (", 1))
+        info = conn.execute(f"PRAGMA table_info({summary})").fetchall()
+        keys = ", ".join(r[1] for r in info if r[5])
+        values = [r[1] for r in info if not r[5]]
+        cols = f"{keys}, {', '.join(values)}"
+        conn.execute(
+            f"CREATE VIEW IF NOT EXISTS {summary}_all AS "
+            f"SELECT {keys}, {', '.join(f'SUM({c}) AS {c}' for c in values)} "
+            f"FROM (SELECT {cols} FROM {summary} UNION ALL SELECT {cols} FROM {summary}_archived) "
+            f"GROUP BY {keys}"
+        )
+    for table in tables:
+        add = [_apply(f"{s}_archived", k, v, "NEW", "+") for s, k, v in CONTRIBUTIONS[table]]
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_archive_contrib AFTER INSERT ON {table}_archive "
+                     f"BEGIN {' '.join(add)} END")
+
+
+def drop_archived_summaries(conn):
+    for summary in SUMMARY_SCHEMA:
+        conn.execute(f"DROP VIEW IF EXISTS {summary}_all")
+        conn.execute(f"DROP TABLE IF EXISTS {summary}_archived")
+
+
+def drop_summaries(conn):
+    drop_triggers(conn)
+    for table in SUMMARY_SCHEMA:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute("DROP TABLE IF EXISTS summary_meta")
+
+
+def create_summaries(conn):
+    for ddl in SUMMARY_SCHEMA.values():
+        conn.execute(ddl)
+    conn.execute(SUMMARY_META_SCHEMA)
+
+
+def refresh_summaries(conn):
+    """Recompute every summary table from the base tables and (re)install the triggers."""
+    create_summaries(conn)
+    for table, sql in SUMMARY_REFRESH.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(sql)
+    for ddl in SUMMARY_INDEXES:
+        conn.execute(ddl)
+    conn.execute("INSERT OR REPLACE INTO summary_meta (key, value) VALUES ('stale', 0)")
+    install_triggers(conn)
+
+
+def summary_drift(conn):
+    """Summary tables whose rows differ from a full recompute (an empty list when in step).
+
+    Groups the triggers have counted down to zero are ignored; readers skip them too.
+    """
+    drifted = []
+    for table, sql in SUMMARY_REFRESH.items():
+        values = [r[1] for r in conn.execute(f"PRAGMA table_info({table})") if not r[5]]
+        nonzero = " OR ".join(f"{c} <> 0" for c in values)
+        conn.execute(f"CREATE TEMP TABLE expected_{table} AS SELECT * FROM {table} WHERE 0")
+        try:
+            conn.execute(sql.replace(f"INSERT INTO {table} ", f"INSERT INTO temp.expected_{table} ", 1))
+            actual = f"SELECT * FROM main.{table} WHERE {nonzero}"
+            expected = f"SELECT * FROM temp.expected_{table} WHERE {nonzero}"
+            differs = conn.execute(
+                f"SELECT 1 FROM ({actual} EXCEPT {expected}) UNION ALL SELECT 1 FROM ({expected} EXCEPT {actual}) "
+                f"LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.execute(f"DROP TABLE temp.expected_{table}")
+        if differs:
+            drifted.append(table)
+    return drifted
+
+
+def summaries_stale(conn):
+    row = conn.execute("SELECT value FROM summary_meta WHERE key = 'stale'").fetchone()
+    return row is None or bool(row[0])